@@ -1,36 +1,639 @@
-from dataclasses import dataclass
-from openai import AsyncOpenAI
+import asyncio
+import hashlib
+import math
+import operator
+import sqlite3
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import NamedTuple
+import httpx
+import orjson
+from openai import NOT_GIVEN, APIError, AsyncOpenAI
 
-@dataclass
+_SHARED_CLIENTS = {}
+
+def install_fast_loop() -> bool:
+    """Switches asyncio to uvloop (winloop on Windows) when it is installed.
+
+    Call it once at startup, before asyncio.run(...) and before any client
+    is created. Returns False and keeps the stdlib loop if neither is available.
+    """
+    for module_name in ("uvloop", "winloop"):
+        try:
+            module = __import__(module_name)
+        except ImportError:
+            continue
+        module.install()
+        return True
+    return False
+
+def get_shared_client(api_key: str = None) -> AsyncOpenAI:
+    """Returns one process-wide AsyncOpenAI client per API key.
+
+    Pass it as `openai_client` to every OpenAIChatCompletionsModel so all
+    agents share one HTTP/2 connection pool instead of each paying its own
+    TCP/TLS handshakes. `None` means the SDK's default (OPENAI_API_KEY).
+    """
+    client = _SHARED_CLIENTS.get(api_key)
+    if client is None:
+        client = _SHARED_CLIENTS[api_key] = AsyncOpenAI(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=256, max_keepalive_connections=128),
+                timeout=httpx.Timeout(60.0, connect=10.0)
+            )
+        )
+    return client
+
+async def close_shared_clients():
+    """Closes every client handed out by get_shared_client(); call on app shutdown"""
+    clients = list(_SHARED_CLIENTS.values())
+    _SHARED_CLIENTS.clear()
+    for client in clients:
+        await client.close()
+
+class DiskCache:
+    """SQLite-backed completion cache that survives process restarts"""
+
+    def __init__(self, path: str, ttl: float = 24 * 3600):
+        # `path` is required: a default relative name would land in whatever
+        # directory the process happened to start in
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key BLOB PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_expires_at ON completions (expires_at)")
+        self._purge_expired()
+
+    def _purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: bytes):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: bytes, content: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, content, expires_at) VALUES (?, ?, ?)",
+                (key, content, now + self.ttl)
+            )
+            # Expired rows are otherwise only skipped on read; the index keeps
+            # this a range delete rather than a table scan
+            self._conn.execute("DELETE FROM completions WHERE expires_at < ?", (now,))
+
+_ENCODINGS = {}
+_BUCKETS = {}
+TOKENS_PER_MESSAGE = 4
+BYTES_PER_TOKEN = 4  # rough average for English text and code
+MODEL_CONTEXT = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4.1-mini": 1047576,
+    "gpt-4.1-nano": 1047576,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o3-mini": 200000,
+    "o4-mini": 200000,
+}
+
+class ContextTooLarge(ValueError):
+    """Raised before sending a prompt that cannot fit the model's context window"""
+
+def _encoding_for(model: str):
+    encoding = _ENCODINGS.get(model)
+    if encoding is None:
+        import tiktoken  # loads BPE tables once per model, on first use
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        _ENCODINGS[model] = encoding
+    return encoding
+
+def estimate_tokens(model: str, messages) -> int:
+    encoding = _encoding_for(model)
+    return sum(len(encoding.encode(str(m["content"]))) for m in messages) + TOKENS_PER_MESSAGE * len(messages)
+
+class AsyncTokenBucket:
+    """Delays callers so spend stays under `rate_per_sec`, allowing bursts up to `capacity`"""
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1):
+        cost = min(cost, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+
+@dataclass(slots=True, frozen=True)
 class OpenAIChatCompletionsModel:
     model: str
     openai_client: AsyncOpenAI
+    temperature: float = 0.7
+    cache_size: int = 1024
+    fast_json: bool = True
+    disk_cache: DiskCache = None
+    tokens_per_minute: int = None
+    context_reserve: int = 1024
+    _cache: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False, compare=False)
+    _inflight: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def _cache_key(self, messages, response_format=None) -> bytes:
+        # Hash role/content directly instead of serializing the message dicts
+        digest = hashlib.blake2b(f"{self.model}|{self.temperature}".encode(), digest_size=16)
+        for message in messages:
+            digest.update(b"\x00" + message["role"].encode() + b"\x01" + str(message["content"]).encode())
+        if response_format:
+            digest.update(b"\x02" + orjson.dumps(response_format, option=orjson.OPT_SORT_KEYS))
+        return digest.digest()
+
+    async def _count_tokens(self, messages):
+        # Fail locally instead of paying a round trip for context_length_exceeded;
+        # the count is reused by the rate limiter. None when neither needs it.
+        context = MODEL_CONTEXT.get(self.model)
+        if context is None and not self.tokens_per_minute:
+            return None
+        overhead = TOKENS_PER_MESSAGE * len(messages)
+        size = sum(len(str(m["content"]).encode()) for m in messages)
+        # Every token covers at least one byte, so the byte count bounds the
+        # token count; only prompts that might not fit pay for BPE (and its
+        # first-use table load), in a thread. The rest get a rough estimate,
+        # which is all the rate limiter needs
+        if context is None or size + overhead <= context - self.context_reserve:
+            return size // BYTES_PER_TOKEN + overhead
+        tokens = await asyncio.to_thread(estimate_tokens, self.model, messages)
+        if context is not None and tokens > context - self.context_reserve:
+            raise ContextTooLarge(
+                f"{tokens} prompt tokens exceed {self.model}'s {context}-token context "
+                f"(minus {self.context_reserve} reserved for the reply)"
+            )
+        return tokens
+
+    async def _throttle(self, tokens):
+        # Shape traffic below the account's TPM limit instead of eating 429 retries;
+        # one bucket per (api key, model) so every wrapper for it shares the budget
+        if not self.tokens_per_minute:
+            return
+        bucket_key = (self.openai_client.api_key, self.model)
+        bucket = _BUCKETS.get(bucket_key)
+        if bucket is None:
+            bucket = _BUCKETS[bucket_key] = AsyncTokenBucket(self.tokens_per_minute / 60, self.tokens_per_minute)
+        await bucket.acquire(tokens)
+
+    def _cache_get(self, key):
+        content = self._cache.get(key)
+        if content is not None:
+            self._cache.move_to_end(key)
+        return content
+
+    def _cache_put(self, key, content):
+        if content is None or self.cache_size <= 0:
+            return
+        self._cache[key] = content
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def cached(self, messages, response_format: dict = None, key: bytes = None):
+        """The stored completion for exactly these messages, or None; never calls the API"""
+        key = key or self._cache_key(messages, response_format)
+        content = self._cache_get(key)
+        if content is None and self.disk_cache is not None:
+            # get() shares a lock with set(), which runs in a thread; waiting
+            # on it here must not block the event loop
+            content = await asyncio.to_thread(self.disk_cache.get, key)
+            self._cache_put(key, content)
+        return content
+
+    async def complete(self, messages, prompt_cache_key: str = None, response_format: dict = None):
+        key = self._cache_key(messages, response_format)
+        content = await self.cached(messages, key=key)
+        if content is not None:
+            return content
+
+        # Single-flight: identical prompts already in flight await the same task,
+        # shielded so one caller's cancellation doesn't cancel the others
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(key, messages, prompt_cache_key, response_format))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fill(self, key, messages, prompt_cache_key, response_format=None):
+        tokens = await self._count_tokens(messages)
+        content = await self._request(messages, tokens, prompt_cache_key, response_format)
+        self._cache_put(key, content)
+        if self.disk_cache is not None and content is not None:
+            await asyncio.to_thread(self.disk_cache.set, key, content)
+        return content
 
-    async def complete(self, messages):
-        response = await self.openai_client.chat.completions.create(
+    async def complete_stream(self, messages, prompt_cache_key: str = None,
+                              flush_interval: float = 0.05, flush_chunks: int = 16):
+        """Yields the completion as it is generated.
+
+        Deltas are coalesced until `flush_chunks` pieces or `flush_interval`
+        seconds accumulate, so consumers aren't scheduled once per token.
+        """
+        key = self._cache_key(messages)
+        content = self._cache_get(key)
+        if content is not None:
+            yield content
+            return
+
+        await self._throttle(await self._count_tokens(messages))
+        parts, pending = [], []
+        finished = False
+        last_flush = time.monotonic()
+        async for delta, finish_reason in self._stream_deltas(messages, prompt_cache_key):
+            finished = finished or finish_reason is not None
+            if not delta:
+                continue
+            pending.append(delta)
+            now = time.monotonic()
+            if len(pending) >= flush_chunks or now - last_flush >= flush_interval:
+                text = "".join(pending)
+                pending.clear()
+                parts.append(text)
+                last_flush = now
+                yield text
+        if pending:
+            text = "".join(pending)
+            parts.append(text)
+            yield text
+        # A stream that ended without a finish_reason was cut off; don't
+        # serve the partial text to later callers
+        if finished:
+            self._cache_put(key, "".join(parts))
+
+    async def _stream_deltas(self, messages, prompt_cache_key=None):
+        """Yields (content, finish_reason) pairs for each streamed choice delta."""
+        extra_body = {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+        if self.fast_json:
+            # Read the raw SSE lines and pull out only choices[0].delta.content,
+            # skipping a Pydantic model per chunk. Non-2xx responses still raise
+            # the SDK's typed errors, after its own retry/backoff
+            async with self.openai_client.chat.completions.with_streaming_response.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+                extra_body=extra_body
+            ) as response:
+                async for line in response.iter_lines():
+                    if not line.startswith("data: ") or line == "data: [DONE]":
+                        continue
+                    payload = orjson.loads(line[6:])
+                    if payload.get("error"):
+                        # Mid-stream failures arrive as a 200 with an error event,
+                        # which the SDK's own stream would raise as well
+                        error = payload["error"]
+                        message = error.get("message") if isinstance(error, dict) else str(error)
+                        raise APIError(
+                            message or "An error occurred during streaming",
+                            response.http_response.request,
+                            body=error
+                        )
+                    choices = payload.get("choices")
+                    if choices:
+                        yield choices[0]["delta"].get("content"), choices[0].get("finish_reason")
+            return
+        stream = await self.openai_client.chat.completions.create(
             model=self.model,
             messages=messages,
-            temperature=0.7
+            temperature=self.temperature,
+            stream=True,
+            extra_body=extra_body
         )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content, chunk.choices[0].finish_reason
+
+    async def _request(self, messages, tokens=None, prompt_cache_key=None, response_format=None):
+        await self._throttle(tokens)
+        kwargs = dict(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            response_format=response_format or NOT_GIVEN,
+            extra_body={"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+        )
+        if self.fast_json:
+            # Decode the body with orjson instead of the SDK's Pydantic response
+            # model. Errors, retries and backoff are the SDK's own, so a failed
+            # request is never sent a second time down the typed path
+            raw = await self.openai_client.chat.completions.with_raw_response.create(**kwargs)
+            return orjson.loads(raw.http_response.content)["choices"][0]["message"]["content"]
+        response = await self.openai_client.chat.completions.create(**kwargs)
         return response.choices[0].message.content
 
+PACKED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "packed_answers",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "answers": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"id": {"type": "integer"}, "answer": {"type": "string"}},
+                        "required": ["id", "answer"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["answers"],
+            "additionalProperties": False
+        }
+    }
+}
+
+class SemanticCache:
+    """Returns a stored answer when a new prompt embeds close enough to an old one"""
+
+    def __init__(self, threshold: float = 0.97, maxsize: int = 512, embedding_model: str = "text-embedding-3-small"):
+        self.threshold = threshold
+        self.embedding_model = embedding_model
+        self._entries = deque(maxlen=maxsize)
+
+    async def embed(self, openai_client: AsyncOpenAI, text: str):
+        response = await openai_client.embeddings.create(model=self.embedding_model, input=text)
+        vector = response.data[0].embedding
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def lookup(self, vector):
+        best, best_score = None, self.threshold
+        for stored, content in self._entries:
+            # Vectors are L2-normalized, so the dot product is the cosine similarity
+            score = sum(map(operator.mul, stored, vector))
+            if score >= best_score:
+                best, best_score = content, score
+        return best
+
+    def add(self, vector, content):
+        if content is not None:
+            self._entries.append((vector, content))
+
 class Agent:
-    def __init__(self, name, instructions, model):
+    """
+    OpenAI only reuses a cached prompt prefix when it matches exactly and is
+    longer than the model's minimum (~1024 tokens). Keep `instructions`
+    constant for the agent's lifetime: no timestamps or request ids.
+    `cache_padding` is appended to short instructions to push them over
+    that minimum. `prompt_cache_key` routes requests with the same prefix
+    to the same cache.
+    """
+
+    def __init__(self, name, instructions, model, semantic_cache: SemanticCache = None,
+                 cache_padding: str = "", prompt_cache_key: str = None,
+                 backup_model: OpenAIChatCompletionsModel = None, hedge_delay_ms: int = 2000,
+                 draft_model: OpenAIChatCompletionsModel = None, judge_fn=None):
         self.name = name
         self.instructions = instructions
         self.model = model
+        self.semantic_cache = semantic_cache
+        self.prompt_cache_key = prompt_cache_key
+        self.backup_model = backup_model
+        self.hedge_delay_ms = hedge_delay_ms
+        self._latencies = deque(maxlen=100)
+        self.draft_model = draft_model
+        self.judge_fn = judge_fn or bool
+        self.draft_calls = 0
+        self.escalations = 0
+        system_content = f"{instructions}\n\n{cache_padding}" if cache_padding else instructions
+        self._system_msg = {"role": "system", "content": system_content}
+
+    def messages(self, prompt):
+        return [self._system_msg, {"role": "user", "content": prompt}]
 
     async def run(self, prompt):
-        messages = [
-            {"role": "system", "content": self.instructions},
-            {"role": "user", "content": prompt}
-        ]
-        return await self.model.complete(messages)
+        messages = self.messages(prompt)
+        if self.semantic_cache is None:
+            return await self._complete(messages)
+
+        # Exact repeats are answered from the model's own cache without paying
+        # for an embedding round trip; only exact misses are embedded
+        content = await self.model.cached(messages)
+        if content is not None:
+            return content
+        vector = await self.semantic_cache.embed(self.model.openai_client, prompt)
+        content = self.semantic_cache.lookup(vector)
+        if content is None:
+            content = await self._complete(messages)
+            self.semantic_cache.add(vector, content)
+        return content
+
+    def specialized_run(self):
+        """Returns a `run(prompt)` coroutine function for hot, plain agents.
+
+        The system message, bound `complete` and cache key are captured as
+        closure locals, so each call allocates only the user message and the
+        list and skips the semantic-cache/hedging branches. Only valid for
+        agents without a semantic cache, backup or draft model.
+        """
+        if self.semantic_cache is not None or self.backup_model is not None or self.draft_model is not None:
+            raise ValueError("specialized_run() only supports agents without semantic_cache/backup_model/draft_model")
+        system_msg = self._system_msg
+        complete = self.model.complete
+        prompt_cache_key = self.prompt_cache_key
+
+        async def run(prompt):
+            return await complete([system_msg, {"role": "user", "content": prompt}], prompt_cache_key)
+        return run
+
+    def _hedge_delay(self) -> float:
+        # Hedge at the primary's rolling median once there are enough samples
+        if len(self._latencies) >= 20:
+            return statistics.median(self._latencies)
+        return self.hedge_delay_ms / 1000
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.draft_calls if self.draft_calls else 0.0
+
+    async def _complete(self, messages):
+        if self.draft_model is not None:
+            # Two-tier: keep the cheap draft unless judge_fn rejects it
+            draft = await self.draft_model.complete(messages, prompt_cache_key=self.prompt_cache_key)
+            self.draft_calls += 1
+            if self.judge_fn(draft):
+                return draft
+            self.escalations += 1
+
+        if self.backup_model is None:
+            return await self.model.complete(messages, prompt_cache_key=self.prompt_cache_key)
+
+        # Cache hits return in microseconds; neither hedge them nor let them
+        # into the latency samples, which would drag the hedge delay toward 0
+        content = await self.model.cached(messages)
+        if content is not None:
+            return content
+
+        # Hedged request: if the primary is slower than usual, race the backup model
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self.model.complete(messages, prompt_cache_key=self.prompt_cache_key))
+
+        def record_latency(task):
+            # A primary cancelled because the backup won was at least this
+            # slow, so it still counts; failures say nothing about latency
+            if task.cancelled() or task.exception() is None:
+                self._latencies.append(time.monotonic() - started)
+
+        primary.add_done_callback(record_latency)
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._hedge_delay())
+            if done:
+                return primary.result()
+
+            pending.add(asyncio.ensure_future(self.backup_model.complete(messages, prompt_cache_key=self.prompt_cache_key)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def run_stream(self, prompt):
+        async for text in self.model.complete_stream(self.messages(prompt), prompt_cache_key=self.prompt_cache_key):
+            yield text
+
+    async def run_packed(self, prompts, max_per_batch: int = 16):
+        """Answers many short, independent prompts with one request per batch.
+
+        Each batch goes out as a single structured-output completion, which
+        trades some output tokens for one round trip instead of one per
+        prompt. Answers come back in prompt order; items the model skipped
+        are None.
+        """
+        async def run_batch(batch):
+            packed = "Answer each item independently. Reply with a JSON object of {id, answer} pairs:\n" + "\n".join(
+                f"[{i}] {prompt}" for i, prompt in enumerate(batch)
+            )
+            content = await self.model.complete(
+                self.messages(packed),
+                prompt_cache_key=self.prompt_cache_key,
+                response_format=PACKED_RESPONSE_FORMAT
+            )
+            answers = [None] * len(batch)
+            for item in orjson.loads(content)["answers"]:
+                if 0 <= item["id"] < len(batch):
+                    answers[item["id"]] = item["answer"]
+            return answers
+
+        batches = await asyncio.gather(*[
+            run_batch(prompts[i:i + max_per_batch]) for i in range(0, len(prompts), max_per_batch)
+        ])
+        return [answer for batch in batches for answer in batch]
+
+class Result(NamedTuple):
+    final_output: str
 
 class Runner:
     @staticmethod
     async def run_async(agent: Agent, prompt: str):
-        class Result:
-            def __init__(self, output): self.final_output = output
-        out = await agent.run(prompt)
-        return Result(out)
+        return Result(await agent.run(prompt))
+
+    @staticmethod
+    async def run_many(agent: Agent, prompts, max_concurrency: int = 32):
+        """Runs every prompt concurrently and returns results in prompt order.
+
+        Agents sharing one AsyncOpenAI client also share its pooled httpx
+        connections, so this scales until max_concurrency or the rate limit.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(prompt):
+            async with sem:
+                return await Runner.run_async(agent, prompt)
+
+        # All coroutines are created before the first await so none wait on another
+        tasks = [run_one(prompt) for prompt in prompts]
+        return await asyncio.gather(*tasks)
+
+    @staticmethod
+    async def run_batch_offline(agent: Agent, prompts, poll_interval: float = 10.0, max_poll_interval: float = 300.0):
+        """Submits prompts through the OpenAI Batch API and waits for the results.
+
+        Batch jobs cost roughly half and do not count against live rate limits,
+        but can take up to 24h. Prompts that fail come back with final_output=None.
+        """
+        client = agent.model.openai_client
+        lines = [
+            orjson.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": agent.model.model,
+                    "messages": agent.messages(prompt),
+                    "temperature": agent.model.temperature,
+                    **({"prompt_cache_key": agent.prompt_cache_key} if agent.prompt_cache_key else {})
+                }
+            })
+            for i, prompt in enumerate(prompts)
+        ]
+        input_file = await client.files.create(file=("batch.jsonl", b"\n".join(lines)), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+        delay = poll_interval
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} finished with status {batch.status}")
+
+        outputs = [None] * len(prompts)
+        output_file = await client.files.content(batch.output_file_id)
+        for line in output_file.text.splitlines():
+            if not line:
+                continue
+            item = orjson.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                outputs[int(item["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+        return [Result(out) for out in outputs]
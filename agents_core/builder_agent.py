@@ -1,95 +1,214 @@
 import os
-from typing import List, Dict, Any
-from pydantic import BaseModel
-import google.generativeai as genai
-from dotenv import load_dotenv
-import json
-
-load_dotenv()
-
-class GeneratedFile(BaseModel):
+import re
+import sys
+import asyncio
+import functools
+import hashlib
+import logging
+import random
+from itertools import chain
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+import orjson
+from utils.gemini_utils import configure_gemini
+from utils.llm_cache import LLMCache, embed_prompt
+
+logger = logging.getLogger(__name__)
+
+# Internal value types: plain slotted dataclasses, no per-instance validation
+@dataclass(slots=True)
+class GeneratedFile:
     path: str
     content: str
+    # Parsed form of JSON files we built ourselves, so they needn't be re-parsed
+    _raw: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
 
-class GenerationResult(BaseModel):
+@dataclass(slots=True)
+class GenerationResult:
     files: List[GeneratedFile]
     success: bool
 
+def _memoize_file(factory):
+    """Caches a pure GeneratedFile factory. Callers still get their own copy,
+    since validate_and_fix_files edits files in place."""
+    cached = functools.lru_cache(maxsize=16)(factory)
+
+    @functools.wraps(factory)
+    def wrapper(*args):
+        file = cached(*args)
+        return GeneratedFile(path=file.path, content=file.content)
+    return wrapper
+
+@functools.lru_cache(maxsize=64)
+def _canon(framework: str) -> str:
+    # The same handful of framework names arrive on every request; lowering
+    # and interning them once makes later table lookups identity hits
+    return sys.intern(framework.lower())
+
+_RESULT_CACHE = LLMCache()
+
+def _cache_key(prompt: str, framework: str, theme: str) -> str:
+    payload = orjson.dumps({"p": " ".join(prompt.split()).lower(), "f": _canon(framework), "t": theme}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+_FRONTEND_FRAMEWORKS = frozenset({"html", "react", "nextjs", "vue", "angular", "svelte", "nuxt", "gatsby"})
+_BACKEND_FRAMEWORKS = frozenset({
+    "nodejs-express", "nodejs-nestjs", "python-django", "python-flask", "python-fastapi",
+    "php-laravel", "php-codeigniter", "ruby-rails", "ruby-sinatra", "java-spring",
+    "csharp-dotnet", "go-gin", "go-echo", "rust-actix", "rust-rocket",
+    # Legacy support
+    "nodejs", "express", "python", "django", "flask", "fastapi", "go", "java", "php"
+})
+
+_SYSTEM_PROMPT_PREFIX = """
+You are an expert AI web developer that generates complete, professional, and production-ready projects based on user prompts.
+
+CRITICAL REQUIREMENTS:
+1. Generate COMPLETE, WORKING code for the EXACT framework specified in the request
+2. DO NOT use any other framework or technology than what is specified
+3. If user specifies HTML/CSS, generate pure HTML, CSS, and JavaScript - NO React, Vue, or other frameworks
+4. If user specifies React, generate React code - NO HTML/CSS only
+5. If user specifies Vue, generate Vue code - NO React or other frameworks
+6. Include ALL necessary configuration files, dependencies, and setup files for the specified framework
+7. Ensure all code follows best practices and modern standards for the specified framework
+8. Create professional, beautiful, and responsive designs using the specified framework
+9. Include proper error handling and validation appropriate for the framework
+10. Generate realistic and functional content based on the prompt
+11. Ensure all file paths are correct for the specified framework structure
+12. Include proper TypeScript types if applicable to the framework
+13. Add comprehensive styling appropriate for the framework (CSS for HTML, styled-components for React, etc.)
+14. Include proper SEO meta tags and accessibility features appropriate for the framework
+
+Additional requirements:
+- Include README.md with setup instructions
+- Add proper .gitignore files
+- Include environment variable templates (.env.example)
+- Add proper package.json with all necessary dependencies
+- Include build and development scripts
+- Add proper configuration files (tsconfig.json, vite.config.js, etc.)
+- Include proper routing and navigation
+- Add responsive design and mobile-first approach
+- Include proper error boundaries and loading states
+- Add proper form validation and user feedback
+
+For full-stack projects:
+- Separate frontend and backend clearly
+- Include proper API endpoints
+- Add database schemas and models
+- Include authentication and authorization
+- Add proper error handling and logging
+- Include environment configuration
+- Add proper CORS and security headers
+
+Return files in this exact format:
+file: path/to/file.ext
+```[file extension]
+[file content here]
+```
+
+Make sure each file is complete and functional. The generated website should be immediately deployable and professional.
+"""
+
+def _genai():
+    # Imported on first use (the SDK drags in grpc/protobuf) and configured
+    # once per process instead of on every request
+    return configure_gemini()
+
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    return _genai().GenerativeModel('gemini-2.0-flash', system_instruction=_SYSTEM_PROMPT_PREFIX)
+
 def initialize_gemini():
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    return genai.GenerativeModel('gemini-2.0-flash')
+    return _get_model()
+
+@functools.lru_cache(maxsize=1)
+def _transient_errors():
+    from google.api_core import exceptions as google_exceptions
+    return (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.InternalServerError,
+    )
+
+_GEMINI_ATTEMPTS = 3
+_GEMINI_TIMEOUT = 120.0
+
+async def _stream_files(model, contents) -> Dict[str, GeneratedFile]:
+    # Stream the response so files are parsed while the rest is still generating
+    response = await model.generate_content_async(contents, stream=True)
+    parser = StreamingFileParser()
+    # Files are keyed by path from here on, so later duplicates replace earlier ones
+    files = {}
+    async for chunk in response:
+        for file in parser.feed(chunk.text):
+            files[file.path] = file
+    for file in parser.close():
+        files[file.path] = file
+    return files
 
-async def generate_code_with_agent(prompt: str, framework: str, theme: str) -> GenerationResult:
-    model = initialize_gemini()
+async def _call_gemini(model, contents) -> Dict[str, GeneratedFile]:
+    """Runs one generation with a per-attempt timeout, retrying transient
+    Gemini errors with jittered exponential backoff"""
+    transient_errors = _transient_errors()
+    for attempt in range(_GEMINI_ATTEMPTS):
+        try:
+            return await asyncio.wait_for(_stream_files(model, contents), timeout=_GEMINI_TIMEOUT)
+        except transient_errors:
+            if attempt == _GEMINI_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(min(10, 2 ** attempt) + random.random())
+
+_INFLIGHT: Dict[str, asyncio.Future] = {}
+
+async def generate_code_with_agent(prompt: str, framework: str, theme: str,
+                                   similarity_text: Optional[str] = None) -> GenerationResult:
+    """Generate a project for prompt, reusing cached results for exact repeats.
+
+    similarity_text is the user's own request; when given, a cached result for
+    a near-duplicate request is reused too. Leave it out when prompt wraps the
+    request in instructions or project context (edits, image requests), which
+    would make unrelated requests embed alike.
+    """
+    cache_key = _cache_key(prompt, framework, theme)
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Concurrent identical requests share one Gemini call; shielded so one
+    # client disconnecting doesn't cancel it for the others
+    task = _INFLIGHT.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_generate(prompt, framework, theme, cache_key, similarity_text))
+        _INFLIGHT[cache_key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(cache_key, None))
+    return await asyncio.shield(task)
+
+async def _generate(prompt: str, framework: str, theme: str, cache_key: str,
+                    similarity_text: Optional[str]) -> GenerationResult:
+    model = _get_model()
+
+    scope = (_canon(framework), theme)
+    vector = await embed_prompt(similarity_text) if similarity_text else None
+    if vector is not None:
+        cached = _RESULT_CACHE.find_similar(scope, vector)
+        if cached is not None:
+            return cached
     
     # Determine project type
-    frontend_frameworks = ["html", "react", "nextjs", "vue", "angular", "svelte", "nuxt", "gatsby"]
-    backend_frameworks = [
-        "nodejs-express", "nodejs-nestjs", "python-django", "python-flask", "python-fastapi",
-        "php-laravel", "php-codeigniter", "ruby-rails", "ruby-sinatra", "java-spring",
-        "csharp-dotnet", "go-gin", "go-echo", "rust-actix", "rust-rocket",
-        # Legacy support
-        "nodejs", "express", "python", "django", "flask", "fastapi", "go", "java", "php"
-    ]
-    is_frontend = framework.lower() in frontend_frameworks
-    is_backend = framework.lower() in backend_frameworks
-    is_fullstack = "fullstack" in framework.lower() or "full stack" in framework.lower()
+    fw = _canon(framework)
+    is_frontend = fw in _FRONTEND_FRAMEWORKS
+    is_backend = fw in _BACKEND_FRAMEWORKS
+    is_fullstack = "fullstack" in fw or "full stack" in fw
     
-    # Enhanced system prompt for professional website generation
+    # Only the request-specific part of the instructions; the constant part is
+    # the model's system_instruction so the provider can reuse its prefix
     system_prompt = f"""
-    You are an expert AI web developer that generates complete, professional, and production-ready projects based on user prompts.
-
     FRAMEWORK REQUIREMENT: You MUST use EXACTLY the framework specified: {framework}
     Current theme: {theme}
     Project type: {'Full-stack' if is_fullstack else 'Frontend' if is_frontend else 'Backend'}
 
-    CRITICAL REQUIREMENTS:
-    1. Generate COMPLETE, WORKING code for the EXACT framework specified: {framework}
-    2. DO NOT use any other framework or technology than what is specified
-    3. If user specifies HTML/CSS, generate pure HTML, CSS, and JavaScript - NO React, Vue, or other frameworks
-    4. If user specifies React, generate React code - NO HTML/CSS only
-    5. If user specifies Vue, generate Vue code - NO React or other frameworks
-    6. Include ALL necessary configuration files, dependencies, and setup files for the specified framework
-    7. Ensure all code follows best practices and modern standards for the specified framework
-    8. Create professional, beautiful, and responsive designs using the specified framework
-    9. Include proper error handling and validation appropriate for the framework
-    10. Generate realistic and functional content based on the prompt
-    11. Ensure all file paths are correct for the specified framework structure
-    12. Include proper TypeScript types if applicable to the framework
-    13. Add comprehensive styling appropriate for the framework (CSS for HTML, styled-components for React, etc.)
-    14. Include proper SEO meta tags and accessibility features appropriate for the framework
-    
     Required files for {framework} projects:
-    {get_required_files(framework, is_frontend, is_backend, is_fullstack)}
-    
-    Additional requirements:
-    - Include README.md with setup instructions
-    - Add proper .gitignore files
-    - Include environment variable templates (.env.example)
-    - Add proper package.json with all necessary dependencies
-    - Include build and development scripts
-    - Add proper configuration files (tsconfig.json, vite.config.js, etc.)
-    - Include proper routing and navigation
-    - Add responsive design and mobile-first approach
-    - Include proper error boundaries and loading states
-    - Add proper form validation and user feedback
-    
-    For full-stack projects:
-    - Separate frontend and backend clearly
-    - Include proper API endpoints
-    - Add database schemas and models
-    - Include authentication and authorization
-    - Add proper error handling and logging
-    - Include environment configuration
-    - Add proper CORS and security headers
-    
-    Return files in this exact format:
-    file: path/to/file.ext
-    ```[file extension]
-    [file content here]
-    ```
-    
-    Make sure each file is complete and functional. The generated website should be immediately deployable and professional.
+    {get_required_files(fw, is_frontend, is_backend, is_fullstack)}
     """
     
     try:
@@ -116,548 +235,521 @@ async def generate_code_with_agent(prompt: str, framework: str, theme: str) -> G
         Generate a complete, working project with all necessary files for the {framework} framework.
         """
         
-        response = await model.generate_content_async(system_prompt + "\n\n" + enhanced_user_prompt)
-        files = parse_generated_files(response.text)
+        # Separate parts of one user turn rather than one concatenated string
+        files = await _call_gemini(model, [system_prompt, enhanced_user_prompt])
         
+        # Post-processing is pure CPU work; keep it off the event loop so other
+        # requests aren't blocked while it runs
         # Ensure all required files are present
-        files = ensure_framework_requirements(framework, files, is_frontend, is_backend, is_fullstack)
+        files = await asyncio.to_thread(ensure_framework_requirements, fw, files, is_frontend, is_backend, is_fullstack)
         
-        # Add deployment configuration files
+        # Deployment and environment configs touch disjoint paths, so build them
+        # concurrently on copies and merge
+        stages = []
         if is_frontend or is_fullstack:
-            files = add_deployment_configs(framework, files)
-        
-        # Add environment configuration
+            stages.append(asyncio.to_thread(add_deployment_configs, fw, dict(files)))
         if is_backend or is_fullstack:
-            files = add_environment_configs(framework, files)
+            stages.append(asyncio.to_thread(add_environment_configs, fw, dict(files)))
+        for staged in await asyncio.gather(*stages):
+            files.update(staged)
         
         # Validate generated files
-        files = validate_and_fix_files(framework, files)
+        files = await asyncio.to_thread(validate_and_fix_files, fw, files)
         
-        return GenerationResult(files=files, success=True)
+        result = GenerationResult(files=files, success=True)
+        _RESULT_CACHE.set(cache_key, result, ttl=3600, scope=scope, vector=vector)
+        return result
     except Exception as e:
-        print(f"Generation error: {str(e)}")
+        logger.error("Generation error: %s", e)
         return GenerationResult(files=[], success=False)
 
-def get_required_files(framework: str, is_frontend: bool, is_backend: bool, is_fullstack: bool) -> str:
-    """Returns comprehensive framework-specific required files"""
-    framework = framework.lower()
-    
-    common_files = {
-        "html": """
-        - index.html (main entry point with modern HTML5 structure)
-        - styles/main.css (comprehensive styling with CSS Grid/Flexbox)
-        - scripts/main.js (interactive functionality)
-        - assets/ (images, icons, fonts)
-        - README.md (setup and usage instructions)
-        - .gitignore
-        """,
-        
-        "react": """
-        - src/App.jsx (main application component)
-        - src/index.jsx (entry point)
-        - src/components/ (reusable components)
-        - src/pages/ (page components)
-        - src/styles/ (CSS modules or styled-components)
-        - src/utils/ (helper functions)
-        - src/hooks/ (custom React hooks)
-        - public/index.html
-        - package.json (with all dependencies)
-        - tsconfig.json (TypeScript configuration)
-        - vite.config.js (Vite configuration)
-        - .gitignore
-        - README.md
-        """,
-        
-        "nextjs": """
-        - src/app/layout.tsx (root layout)
-        - src/app/page.tsx (homepage)
-        - src/app/globals.css (global styles)
-        - src/components/ (reusable components)
-        - src/lib/ (utility functions)
-        - src/types/ (TypeScript types)
-        - public/ (static assets)
-        - package.json
-        - next.config.js
-        - tsconfig.json
-        - tailwind.config.js (if using Tailwind)
-        - .gitignore
-        - README.md
-        """,
-
-        "nuxt": """
-        - pages/index.vue (homepage)
-        - layouts/default.vue (default layout)
-        - components/ (reusable components)
-        - assets/ (styles, images)
-        - static/ (static files)
-        - plugins/ (Vue plugins)
-        - middleware/ (route middleware)
-        - package.json
-        - nuxt.config.js
-        - .gitignore
-        - README.md
-        """,
-
-        "gatsby": """
-        - src/pages/index.js (homepage)
-        - src/components/ (reusable components)
-        - src/templates/ (page templates)
-        - src/images/ (images)
-        - static/ (static files)
-        - gatsby-config.js
-        - gatsby-node.js
-        - package.json
-        - .gitignore
-        - README.md
-        """,
-        
-        "vue": """
-        - src/App.vue (main application)
-        - src/main.js (entry point)
-        - src/components/ (reusable components)
-        - src/views/ (page components)
-        - src/router/ (Vue Router configuration)
-        - src/store/ (Pinia store)
-        - src/assets/ (styles, images)
-        - public/index.html
-        - package.json
-        - vite.config.js
-        - .gitignore
-        - README.md
-        """,
-        
-        "angular": """
-        - src/app/app.component.html (main component)
-        - src/app/app.component.ts
-        - src/app/app.component.css
-        - src/app/app.module.ts
-        - src/main.ts (entry point)
-        - src/styles.css (global styles)
-        - src/app/components/ (reusable components)
-        - src/app/pages/ (page components)
-        - src/app/services/ (services)
-        - angular.json
-        - package.json
-        - tsconfig.json
-        - .gitignore
-        - README.md
-        """,
-        
-        "svelte": """
-        - src/App.svelte (main application)
-        - src/main.js (entry point)
-        - src/components/ (reusable components)
-        - src/routes/ (page components)
-        - src/lib/ (utility functions)
-        - src/app.html
-        - package.json
-        - svelte.config.js
-        - vite.config.js
-        - .gitignore
-        - README.md
-        """,
-        
-        "nodejs": """
-        - server.js (main server file)
-        - package.json (with all dependencies)
-        - .env.example (environment variables template)
-        - .gitignore
-        - README.md
-        """,
-        
-        "express": """
-        - server.js (main server file)
-        - routes/ (API route handlers)
-        - controllers/ (business logic)
-        - middleware/ (custom middleware)
-        - models/ (data models)
-        - config/ (configuration files)
-        - package.json
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-        
-        "python": """
-        - main.py (main application file)
-        - requirements.txt (Python dependencies)
-        - .env.example (environment variables)
-        - .gitignore
-        - README.md
-        """,
-        
-        "django": """
-        - manage.py (Django management)
-        - requirements.txt
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-        
-        "flask": """
-        - app.py (Flask application)
-        - requirements.txt
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-        
-        "fastapi": """
-        - main.py (FastAPI application)
-        - requirements.txt
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-        
-        "go": """
-        - main.go (main application)
-        - go.mod (Go modules)
-        - go.sum (Go dependencies)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-        
-        "java": """
-        - src/main/java/ (Java source files)
-        - src/main/resources/ (resources)
-        - pom.xml (Maven configuration)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-        
-        "php": """
-        - index.php (main entry point)
-        - composer.json (PHP dependencies)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        # New backend frameworks
-        "nodejs-express": """
-        - server.js (Express server)
-        - routes/ (API routes)
-        - controllers/ (business logic)
-        - middleware/ (custom middleware)
-        - models/ (data models)
-        - config/ (configuration)
-        - package.json
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "nodejs-nestjs": """
-        - src/main.ts (NestJS entry point)
-        - src/app.module.ts (root module)
-        - src/app.controller.ts (main controller)
-        - src/app.service.ts (main service)
-        - src/modules/ (feature modules)
-        - package.json
-        - nest-cli.json
-        - tsconfig.json
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "python-django": """
-        - manage.py (Django management)
-        - myproject/ (project directory)
-        - myproject/settings.py (settings)
-        - myproject/urls.py (URL configuration)
-        - myproject/wsgi.py (WSGI config)
-        - myapp/ (Django app)
-        - requirements.txt
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "python-flask": """
-        - app.py (Flask application)
-        - routes/ (route handlers)
-        - models/ (data models)
-        - templates/ (Jinja2 templates)
-        - static/ (static files)
-        - requirements.txt
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "python-fastapi": """
-        - main.py (FastAPI application)
-        - routers/ (API routers)
-        - models/ (Pydantic models)
-        - database/ (database config)
-        - requirements.txt
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "php-laravel": """
-        - app/ (application logic)
-        - routes/ (route definitions)
-        - database/ (migrations, seeders)
-        - resources/ (views, assets)
-        - config/ (configuration files)
-        - composer.json
-        - .env.example
-        - artisan (Laravel CLI)
-        - .gitignore
-        - README.md
-        """,
-
-        "php-codeigniter": """
-        - application/ (MVC structure)
-        - system/ (CodeIgniter core)
-        - index.php (entry point)
-        - composer.json
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "ruby-rails": """
-        - app/ (MVC structure)
-        - config/ (configuration)
-        - db/ (database files)
-        - Gemfile (dependencies)
-        - config.ru (Rack config)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "ruby-sinatra": """
-        - app.rb (Sinatra application)
-        - views/ (templates)
-        - public/ (static files)
-        - Gemfile (dependencies)
-        - config.ru (Rack config)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "java-spring": """
-        - src/main/java/ (Java source)
-        - src/main/resources/ (resources)
-        - src/test/java/ (tests)
-        - pom.xml (Maven config)
-        - application.properties
-        - .gitignore
-        - README.md
-        """,
-
-        "csharp-dotnet": """
-        - Program.cs (entry point)
-        - Controllers/ (API controllers)
-        - Models/ (data models)
-        - Services/ (business logic)
-        - appsettings.json (configuration)
-        - .csproj (project file)
-        - .gitignore
-        - README.md
-        """,
-
-        "go-gin": """
-        - main.go (entry point)
-        - handlers/ (HTTP handlers)
-        - models/ (data models)
-        - middleware/ (middleware)
-        - go.mod (Go modules)
-        - go.sum (dependencies)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "go-echo": """
-        - main.go (entry point)
-        - handlers/ (HTTP handlers)
-        - models/ (data models)
-        - middleware/ (middleware)
-        - go.mod (Go modules)
-        - go.sum (dependencies)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "rust-actix": """
-        - src/main.rs (entry point)
-        - src/handlers/ (request handlers)
-        - src/models/ (data models)
-        - Cargo.toml (dependencies)
-        - .env.example
-        - .gitignore
-        - README.md
-        """,
-
-        "rust-rocket": """
-        - src/main.rs (entry point)
-        - src/routes/ (route handlers)
-        - src/models/ (data models)
-        - Cargo.toml (dependencies)
-        - Rocket.toml (Rocket config)
-        - .env.example
-        - .gitignore
-        - README.md
-        """
-    }
-    
-    if is_fullstack:
-        return """
+_COMMON_FILES: Dict[str, str] = {
+    "html": """
+    - index.html (main entry point with modern HTML5 structure)
+    - styles/main.css (comprehensive styling with CSS Grid/Flexbox)
+    - scripts/main.js (interactive functionality)
+    - assets/ (images, icons, fonts)
+    - README.md (setup and usage instructions)
+    - .gitignore
+    """,
+
+    "react": """
+    - src/App.jsx (main application component)
+    - src/index.jsx (entry point)
+    - src/components/ (reusable components)
+    - src/pages/ (page components)
+    - src/styles/ (CSS modules or styled-components)
+    - src/utils/ (helper functions)
+    - src/hooks/ (custom React hooks)
+    - public/index.html
+    - package.json (with all dependencies)
+    - tsconfig.json (TypeScript configuration)
+    - vite.config.js (Vite configuration)
+    - .gitignore
+    - README.md
+    """,
+
+    "nextjs": """
+    - src/app/layout.tsx (root layout)
+    - src/app/page.tsx (homepage)
+    - src/app/globals.css (global styles)
+    - src/components/ (reusable components)
+    - src/lib/ (utility functions)
+    - src/types/ (TypeScript types)
+    - public/ (static assets)
+    - package.json
+    - next.config.js
+    - tsconfig.json
+    - tailwind.config.js (if using Tailwind)
+    - .gitignore
+    - README.md
+    """,
+
+    "nuxt": """
+    - pages/index.vue (homepage)
+    - layouts/default.vue (default layout)
+    - components/ (reusable components)
+    - assets/ (styles, images)
+    - static/ (static files)
+    - plugins/ (Vue plugins)
+    - middleware/ (route middleware)
+    - package.json
+    - nuxt.config.js
+    - .gitignore
+    - README.md
+    """,
+
+    "gatsby": """
+    - src/pages/index.js (homepage)
+    - src/components/ (reusable components)
+    - src/templates/ (page templates)
+    - src/images/ (images)
+    - static/ (static files)
+    - gatsby-config.js
+    - gatsby-node.js
+    - package.json
+    - .gitignore
+    - README.md
+    """,
+
+    "vue": """
+    - src/App.vue (main application)
+    - src/main.js (entry point)
+    - src/components/ (reusable components)
+    - src/views/ (page components)
+    - src/router/ (Vue Router configuration)
+    - src/store/ (Pinia store)
+    - src/assets/ (styles, images)
+    - public/index.html
+    - package.json
+    - vite.config.js
+    - .gitignore
+    - README.md
+    """,
+
+    "angular": """
+    - src/app/app.component.html (main component)
+    - src/app/app.component.ts
+    - src/app/app.component.css
+    - src/app/app.module.ts
+    - src/main.ts (entry point)
+    - src/styles.css (global styles)
+    - src/app/components/ (reusable components)
+    - src/app/pages/ (page components)
+    - src/app/services/ (services)
+    - angular.json
+    - package.json
+    - tsconfig.json
+    - .gitignore
+    - README.md
+    """,
+
+    "svelte": """
+    - src/App.svelte (main application)
+    - src/main.js (entry point)
+    - src/components/ (reusable components)
+    - src/routes/ (page components)
+    - src/lib/ (utility functions)
+    - src/app.html
+    - package.json
+    - svelte.config.js
+    - vite.config.js
+    - .gitignore
+    - README.md
+    """,
+
+    "nodejs": """
+    - server.js (main server file)
+    - package.json (with all dependencies)
+    - .env.example (environment variables template)
+    - .gitignore
+    - README.md
+    """,
+
+    "express": """
+    - server.js (main server file)
+    - routes/ (API route handlers)
+    - controllers/ (business logic)
+    - middleware/ (custom middleware)
+    - models/ (data models)
+    - config/ (configuration files)
+    - package.json
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "python": """
+    - main.py (main application file)
+    - requirements.txt (Python dependencies)
+    - .env.example (environment variables)
+    - .gitignore
+    - README.md
+    """,
+
+    "django": """
+    - manage.py (Django management)
+    - requirements.txt
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "flask": """
+    - app.py (Flask application)
+    - requirements.txt
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "fastapi": """
+    - main.py (FastAPI application)
+    - requirements.txt
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "go": """
+    - main.go (main application)
+    - go.mod (Go modules)
+    - go.sum (Go dependencies)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "java": """
+    - src/main/java/ (Java source files)
+    - src/main/resources/ (resources)
+    - pom.xml (Maven configuration)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "php": """
+    - index.php (main entry point)
+    - composer.json (PHP dependencies)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    # New backend frameworks
+    "nodejs-express": """
+    - server.js (Express server)
+    - routes/ (API routes)
+    - controllers/ (business logic)
+    - middleware/ (custom middleware)
+    - models/ (data models)
+    - config/ (configuration)
+    - package.json
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "nodejs-nestjs": """
+    - src/main.ts (NestJS entry point)
+    - src/app.module.ts (root module)
+    - src/app.controller.ts (main controller)
+    - src/app.service.ts (main service)
+    - src/modules/ (feature modules)
+    - package.json
+    - nest-cli.json
+    - tsconfig.json
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "python-django": """
+    - manage.py (Django management)
+    - myproject/ (project directory)
+    - myproject/settings.py (settings)
+    - myproject/urls.py (URL configuration)
+    - myproject/wsgi.py (WSGI config)
+    - myapp/ (Django app)
+    - requirements.txt
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "python-flask": """
+    - app.py (Flask application)
+    - routes/ (route handlers)
+    - models/ (data models)
+    - templates/ (Jinja2 templates)
+    - static/ (static files)
+    - requirements.txt
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "python-fastapi": """
+    - main.py (FastAPI application)
+    - routers/ (API routers)
+    - models/ (Pydantic models)
+    - database/ (database config)
+    - requirements.txt
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "php-laravel": """
+    - app/ (application logic)
+    - routes/ (route definitions)
+    - database/ (migrations, seeders)
+    - resources/ (views, assets)
+    - config/ (configuration files)
+    - composer.json
+    - .env.example
+    - artisan (Laravel CLI)
+    - .gitignore
+    - README.md
+    """,
+
+    "php-codeigniter": """
+    - application/ (MVC structure)
+    - system/ (CodeIgniter core)
+    - index.php (entry point)
+    - composer.json
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "ruby-rails": """
+    - app/ (MVC structure)
+    - config/ (configuration)
+    - db/ (database files)
+    - Gemfile (dependencies)
+    - config.ru (Rack config)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "ruby-sinatra": """
+    - app.rb (Sinatra application)
+    - views/ (templates)
+    - public/ (static files)
+    - Gemfile (dependencies)
+    - config.ru (Rack config)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "java-spring": """
+    - src/main/java/ (Java source)
+    - src/main/resources/ (resources)
+    - src/test/java/ (tests)
+    - pom.xml (Maven config)
+    - application.properties
+    - .gitignore
+    - README.md
+    """,
+
+    "csharp-dotnet": """
+    - Program.cs (entry point)
+    - Controllers/ (API controllers)
+    - Models/ (data models)
+    - Services/ (business logic)
+    - appsettings.json (configuration)
+    - .csproj (project file)
+    - .gitignore
+    - README.md
+    """,
+
+    "go-gin": """
+    - main.go (entry point)
+    - handlers/ (HTTP handlers)
+    - models/ (data models)
+    - middleware/ (middleware)
+    - go.mod (Go modules)
+    - go.sum (dependencies)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "go-echo": """
+    - main.go (entry point)
+    - handlers/ (HTTP handlers)
+    - models/ (data models)
+    - middleware/ (middleware)
+    - go.mod (Go modules)
+    - go.sum (dependencies)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "rust-actix": """
+    - src/main.rs (entry point)
+    - src/handlers/ (request handlers)
+    - src/models/ (data models)
+    - Cargo.toml (dependencies)
+    - .env.example
+    - .gitignore
+    - README.md
+    """,
+
+    "rust-rocket": """
+    - src/main.rs (entry point)
+    - src/routes/ (route handlers)
+    - src/models/ (data models)
+    - Cargo.toml (dependencies)
+    - Rocket.toml (Rocket config)
+    - .env.example
+    - .gitignore
+    - README.md
+    """
+}
+
+_FULLSTACK_FILES = """
         FRONTEND:
         - Complete frontend application with all necessary files
         - Modern, responsive design
         - Proper routing and navigation
         - State management
         - API integration
-        
+
         BACKEND:
         - Complete backend API with all endpoints
         - Database models and schemas
         - Authentication and authorization
         - Error handling and validation
         - Environment configuration
-        
+
         DEPLOYMENT:
         - Docker configuration
         - Environment files
         - Build scripts
         - Documentation
         """
-    
-    return common_files.get(framework, 
-        "- Main entry file\n"
-        "- Required configuration files\n"
-        "- Dependencies and package files\n"
-        "- Documentation and setup instructions"
-    )
 
-def ensure_framework_requirements(framework: str, files: List[GeneratedFile], is_frontend: bool, is_backend: bool, is_fullstack: bool) -> List[GeneratedFile]:
+_DEFAULT_FILES = (
+    "- Main entry file\n"
+    "- Required configuration files\n"
+    "- Dependencies and package files\n"
+    "- Documentation and setup instructions"
+)
+
+def get_required_files(framework: str, is_frontend: bool, is_backend: bool, is_fullstack: bool) -> str:
+    """Returns comprehensive framework-specific required files"""
+    if is_fullstack:
+        return _FULLSTACK_FILES
+    return _COMMON_FILES.get(framework, _DEFAULT_FILES)
+
+def ensure_framework_requirements(framework: str, files: Dict[str, GeneratedFile], is_frontend: bool, is_backend: bool, is_fullstack: bool) -> Dict[str, GeneratedFile]:
     """Ensures all framework-specific requirements are met"""
-    framework = framework.lower()
-    
-    # Check if required files exist
-    existing_paths = [f.path for f in files]
-    
-    # Add missing essential files
-    if framework in ["react", "nextjs", "vue", "angular", "svelte"] or is_fullstack:
-        if not any(f.path == "package.json" for f in files):
-            files.append(create_package_json(framework))
-        
-        if not any(f.path == ".gitignore" for f in files):
-            files.append(create_gitignore(framework))
-        
-        if not any(f.path == "README.md" for f in files):
-            files.append(create_readme(framework))
-    
-    elif framework in ["nodejs", "express"] or is_fullstack:
-        if not any(f.path == "package.json" for f in files):
-            files.append(create_package_json(framework))
-        
-        if not any(f.path == ".env.example" for f in files):
-            files.append(create_env_example(framework))
-    
-    elif framework in ["python", "django", "flask", "fastapi"] or is_fullstack:
-        if not any(f.path == "requirements.txt" for f in files):
-            files.append(create_requirements_txt(framework))
-        
-        if not any(f.path == ".env.example" for f in files):
-            files.append(create_env_example(framework))
-    
-    elif framework in ["go"] or is_fullstack:
-        if not any(f.path == "go.mod" for f in files):
-            files.append(create_go_mod(framework))
-    
-    elif framework in ["java"] or is_fullstack:
-        if not any(f.path == "pom.xml" for f in files):
-            files.append(create_pom_xml(framework))
-    
-    elif framework in ["php"] or is_fullstack:
-        if not any(f.path == "composer.json" for f in files):
-            files.append(create_composer_json(framework))
-    
-    # Always add README and .gitignore if missing
-    if not any(f.path == "README.md" for f in files):
-        files.append(create_readme(framework))
-    
-    if not any(f.path == ".gitignore" for f in files):
-        files.append(create_gitignore(framework))
+    needed = _FULLSTACK_REQUIRED if is_fullstack else _REQUIRED_BY_FRAMEWORK.get(framework, ())
+    for path, factory in chain(needed, _UNIVERSAL_REQUIRED):
+        if path not in files:
+            files[path] = factory(framework)
     
     return files
 
-def add_deployment_configs(framework: str, files: List[GeneratedFile]) -> List[GeneratedFile]:
+def add_deployment_configs(framework: str, files: Dict[str, GeneratedFile]) -> Dict[str, GeneratedFile]:
     """Adds deployment configuration files"""
-    framework = framework.lower()
     
     # Add Netlify configuration
-    if not any(f.path == "netlify.toml" for f in files):
-        files.append(create_netlify_config(framework))
+    if "netlify.toml" not in files:
+        files["netlify.toml"] = create_netlify_config(framework)
     
     # Add Vercel configuration for Next.js
-    if framework == "nextjs" and not any(f.path == "vercel.json" for f in files):
-        files.append(create_vercel_config())
+    if framework == "nextjs" and "vercel.json" not in files:
+        files["vercel.json"] = create_vercel_config()
     
     # Add Docker configuration for full-stack projects
-    if not any(f.path == "Dockerfile" for f in files):
-        files.append(create_dockerfile(framework))
+    if "Dockerfile" not in files:
+        files["Dockerfile"] = create_dockerfile(framework)
     
     return files
 
-def add_environment_configs(framework: str, files: List[GeneratedFile]) -> List[GeneratedFile]:
+def add_environment_configs(framework: str, files: Dict[str, GeneratedFile]) -> Dict[str, GeneratedFile]:
     """Adds environment configuration files"""
-    framework = framework.lower()
     
     # Add environment example file
-    if not any(f.path == ".env.example" for f in files):
-        files.append(create_env_example(framework))
+    if ".env.example" not in files:
+        files[".env.example"] = create_env_example(framework)
     
     # Add environment validation
-    if not any(f.path == "config/env.js" for f in files) and framework in ["nodejs", "express"]:
-        files.append(create_env_validation())
+    if "config/env.js" not in files and framework in ["nodejs", "express"]:
+        files["config/env.js"] = create_env_validation()
     
     return files
 
-def validate_and_fix_files(framework: str, files: List[GeneratedFile]) -> List[GeneratedFile]:
+_COMPONENT_JS_RE = re.compile(r"component.*\.js$")
+
+def validate_and_fix_files(framework: str, files: Dict[str, GeneratedFile]) -> List[GeneratedFile]:
     """Validates and fixes generated files"""
-    framework = framework.lower()
+    is_nextjs = framework == "nextjs"
+    fixed = {}
     
     # Ensure proper file structure
-    for file in files:
+    for file in files.values():
         # Fix common path issues
         if file.path.startswith("/"):
             file.path = file.path[1:]
         
         # Ensure proper file extensions
-        if framework == "nextjs" and file.path.endswith(".js") and "component" in file.path:
+        if is_nextjs and _COMPONENT_JS_RE.search(file.path):
             file.path = file.path.replace(".js", ".tsx")
         
         # Fix package.json content
         if file.path == "package.json":
             try:
-                content = json.loads(file.content)
+                content = file._raw if file._raw is not None else orjson.loads(file.content)
+                changed = False
                 if "scripts" not in content:
                     content["scripts"] = get_default_scripts(framework)
+                    changed = True
                 if "dependencies" not in content:
                     content["dependencies"] = get_default_dependencies(framework)
-                file.content = json.dumps(content, indent=2)
-            except:
+                    changed = True
+                # Only re-serialize when something was actually added
+                if changed:
+                    file.content = orjson.dumps(content, option=orjson.OPT_INDENT_2).decode()
+            except (orjson.JSONDecodeError, TypeError):
+                # Invalid JSON, or valid JSON that isn't an object: leave it as generated
                 pass
+        
+        # A fixed path can collide with a default we added; the generated file comes first and wins
+        fixed.setdefault(file.path, file)
     
-    return files
+    return list(fixed.values())
 
 def create_package_json(framework: str) -> GeneratedFile:
     """Creates comprehensive package.json for JavaScript frameworks"""
-    framework = framework.lower()
+    framework = _canon(framework)
     
     base_config = {
         "name": f"generated-{framework}-project",
@@ -672,121 +764,123 @@ def create_package_json(framework: str) -> GeneratedFile:
         }
     }
     
-    return GeneratedFile(
+    file = GeneratedFile(
         path="package.json",
-        content=json.dumps(base_config, indent=2)
+        content=orjson.dumps(base_config, option=orjson.OPT_INDENT_2).decode()
     )
+    file._raw = base_config
+    return file
+
+_SCRIPTS: Dict[str, Dict[str, str]] = {
+    "react": {
+        "start": "react-scripts start",
+        "build": "react-scripts build",
+        "test": "react-scripts test",
+        "eject": "react-scripts eject"
+    },
+    "nextjs": {
+        "dev": "next dev",
+        "build": "next build",
+        "start": "next start",
+        "lint": "next lint"
+    },
+    "vue": {
+        "dev": "vite",
+        "build": "vite build",
+        "preview": "vite preview"
+    },
+    "svelte": {
+        "dev": "vite dev",
+        "build": "vite build",
+        "preview": "vite preview"
+    },
+    "nodejs": {
+        "start": "node server.js",
+        "dev": "nodemon server.js"
+    },
+    "express": {
+        "start": "node server.js",
+        "dev": "nodemon server.js"
+    }
+}
+
+_DEFAULT_SCRIPTS = {
+    "dev": "echo 'No dev script'",
+    "start": "echo 'No start script'",
+    "build": "echo 'No build script'"
+}
 
 def get_default_scripts(framework: str) -> Dict[str, str]:
     """Returns default scripts for different frameworks"""
-    scripts = {
-        "react": {
-            "start": "react-scripts start",
-            "build": "react-scripts build",
-            "test": "react-scripts test",
-            "eject": "react-scripts eject"
-        },
-        "nextjs": {
-            "dev": "next dev",
-            "build": "next build",
-            "start": "next start",
-            "lint": "next lint"
-        },
-        "vue": {
-            "dev": "vite",
-            "build": "vite build",
-            "preview": "vite preview"
-        },
-        "svelte": {
-            "dev": "vite dev",
-            "build": "vite build",
-            "preview": "vite preview"
-        },
-        "nodejs": {
-            "start": "node server.js",
-            "dev": "nodemon server.js"
-        },
-        "express": {
-            "start": "node server.js",
-            "dev": "nodemon server.js"
-        }
+    return _SCRIPTS.get(framework, _DEFAULT_SCRIPTS)
+
+_DEPS: Dict[str, Dict[str, str]] = {
+    "react": {
+        "react": "^18.2.0",
+        "react-dom": "^18.2.0",
+        "react-router-dom": "^6.8.0"
+    },
+    "nextjs": {
+        "next": "^14.0.0",
+        "react": "^18.2.0",
+        "react-dom": "^18.2.0"
+    },
+    "vue": {
+        "vue": "^3.3.0",
+        "vue-router": "^4.2.0",
+        "pinia": "^2.1.0"
+    },
+    "svelte": {
+        "svelte": "^4.2.0"
+    },
+    "nodejs": {
+        "express": "^4.18.0",
+        "cors": "^2.8.5",
+        "dotenv": "^16.0.0"
+    },
+    "express": {
+        "express": "^4.18.0",
+        "cors": "^2.8.5",
+        "dotenv": "^16.0.0",
+        "helmet": "^7.0.0"
     }
-    
-    return scripts.get(framework, {
-        "dev": "echo 'No dev script'",
-        "start": "echo 'No start script'",
-        "build": "echo 'No build script'"
-    })
+}
 
 def get_default_dependencies(framework: str) -> Dict[str, str]:
     """Returns default dependencies for different frameworks"""
-    deps = {
-        "react": {
-            "react": "^18.2.0",
-            "react-dom": "^18.2.0",
-            "react-router-dom": "^6.8.0"
-        },
-        "nextjs": {
-            "next": "^14.0.0",
-            "react": "^18.2.0",
-            "react-dom": "^18.2.0"
-        },
-        "vue": {
-            "vue": "^3.3.0",
-            "vue-router": "^4.2.0",
-            "pinia": "^2.1.0"
-        },
-        "svelte": {
-            "svelte": "^4.2.0"
-        },
-        "nodejs": {
-            "express": "^4.18.0",
-            "cors": "^2.8.5",
-            "dotenv": "^16.0.0"
-        },
-        "express": {
-            "express": "^4.18.0",
-            "cors": "^2.8.5",
-            "dotenv": "^16.0.0",
-            "helmet": "^7.0.0"
-        }
+    return _DEPS.get(framework, {})
+
+_DEV_DEPS: Dict[str, Dict[str, str]] = {
+    "react": {
+        "react-scripts": "^5.0.1"
+    },
+    "nextjs": {
+        "@types/node": "^20.0.0",
+        "@types/react": "^18.2.0",
+        "@types/react-dom": "^18.2.0",
+        "typescript": "^5.0.0"
+    },
+    "vue": {
+        "@vitejs/plugin-vue": "^4.0.0",
+        "vite": "^4.0.0"
+    },
+    "svelte": {
+        "@sveltejs/vite-plugin-svelte": "^2.0.0",
+        "vite": "^4.0.0"
+    },
+    "nodejs": {
+        "nodemon": "^3.0.0"
+    },
+    "express": {
+        "nodemon": "^3.0.0"
     }
-    
-    return deps.get(framework, {})
+}
 
 def get_default_dev_dependencies(framework: str) -> Dict[str, str]:
     """Returns default dev dependencies for different frameworks"""
-    dev_deps = {
-        "react": {
-            "react-scripts": "^5.0.1"
-        },
-        "nextjs": {
-            "@types/node": "^20.0.0",
-            "@types/react": "^18.2.0",
-            "@types/react-dom": "^18.2.0",
-            "typescript": "^5.0.0"
-        },
-        "vue": {
-            "@vitejs/plugin-vue": "^4.0.0",
-            "vite": "^4.0.0"
-        },
-        "svelte": {
-            "@sveltejs/vite-plugin-svelte": "^2.0.0",
-            "vite": "^4.0.0"
-        },
-        "nodejs": {
-            "nodemon": "^3.0.0"
-        },
-        "express": {
-            "nodemon": "^3.0.0"
-        }
-    }
-    
-    return dev_deps.get(framework, {})
+    return _DEV_DEPS.get(framework, {})
 
-def create_gitignore(framework: str) -> GeneratedFile:
-    """Creates comprehensive .gitignore file"""
-    content = """
+_GITIGNORE_CONTENT = """
 # Dependencies
 node_modules/
 npm-debug.log*
@@ -872,14 +966,18 @@ go.work
 *.war
 *.ear
 target/
-"""
-    
-    return GeneratedFile(path=".gitignore", content=content.strip())
+""".strip()
+
+def create_gitignore(framework: str) -> GeneratedFile:
+    """Creates comprehensive .gitignore file"""
+    return GeneratedFile(path=".gitignore", content=_GITIGNORE_CONTENT)
 
 def create_readme(framework: str) -> GeneratedFile:
     """Creates comprehensive README.md file"""
-    framework = framework.lower()
-    
+    return GeneratedFile(path="README.md", content=_readme_content(_canon(framework)))
+
+@functools.lru_cache(maxsize=32)
+def _readme_content(framework: str) -> str:
     content = f"""# Generated {framework.title()} Project
 
 This project was generated using CodeFusion AI, an advanced AI-powered website builder.
@@ -990,14 +1088,9 @@ This project is generated by CodeFusion AI.
 For support and questions, please refer to the CodeFusion AI documentation.
 """
     
-    return GeneratedFile(path="README.md", content=content.strip())
+    return content.strip()
 
-def create_env_example(framework: str) -> GeneratedFile:
-    """Creates environment variables template"""
-    framework = framework.lower()
-    
-    if framework in ["nodejs", "express"]:
-        content = """# Server Configuration
+_NODE_ENV_EXAMPLE = """# Server Configuration
 PORT=3000
 NODE_ENV=development
 
@@ -1022,9 +1115,9 @@ SMTP_PASS=your_app_password
 # File Upload
 UPLOAD_PATH=./uploads
 MAX_FILE_SIZE=5242880
-"""
-    elif framework in ["python", "django", "flask", "fastapi"]:
-        content = """# Flask/FastAPI Configuration
+""".strip()
+
+_PYTHON_ENV_EXAMPLE = """# Flask/FastAPI Configuration
 FLASK_APP=app.py
 FLASK_ENV=development
 SECRET_KEY=your_secret_key_here
@@ -1047,9 +1140,9 @@ MAIL_PORT=587
 MAIL_USE_TLS=True
 MAIL_USERNAME=your_email@gmail.com
 MAIL_PASSWORD=your_app_password
-"""
-    elif framework == "go":
-        content = """# Go Configuration
+""".strip()
+
+_GO_ENV_EXAMPLE = """# Go Configuration
 PORT=8080
 ENV=development
 
@@ -1061,9 +1154,9 @@ JWT_SECRET=your_jwt_secret_here
 
 # External APIs
 API_KEY=your_api_key_here
-"""
-    elif framework == "java":
-        content = """# Java Configuration
+""".strip()
+
+_JAVA_ENV_EXAMPLE = """# Java Configuration
 SERVER_PORT=8080
 SPRING_PROFILES_ACTIVE=development
 
@@ -1075,27 +1168,34 @@ SPRING_DATASOURCE_PASSWORD=password
 # JPA Configuration
 SPRING_JPA_HIBERNATE_DDL_AUTO=update
 SPRING_JPA_SHOW_SQL=true
-"""
-    else:
-        content = """# Environment Variables
+""".strip()
+
+_DEFAULT_ENV_EXAMPLE = """# Environment Variables
 # Add your environment variables here
 API_KEY=your_api_key_here
 DATABASE_URL=your_database_url_here
-"""
-    
-    return GeneratedFile(path=".env.example", content=content.strip())
+""".strip()
 
-def create_netlify_config(framework: str) -> GeneratedFile:
-    """Creates Netlify configuration file"""
-    config = f"""
+_ENV_EXAMPLES = {
+    **dict.fromkeys(("nodejs", "express"), _NODE_ENV_EXAMPLE),
+    **dict.fromkeys(("python", "django", "flask", "fastapi"), _PYTHON_ENV_EXAMPLE),
+    "go": _GO_ENV_EXAMPLE,
+    "java": _JAVA_ENV_EXAMPLE,
+}
+
+def create_env_example(framework: str) -> GeneratedFile:
+    """Creates environment variables template"""
+    return GeneratedFile(path=".env.example", content=_ENV_EXAMPLES.get(_canon(framework), _DEFAULT_ENV_EXAMPLE))
+
+_NETLIFY_TEMPLATE = """
 [build]
-  command = "{get_build_command(framework)}"
-  publish = "{get_publish_dir(framework)}"
+  command = "{build}"
+  publish = "{publish}"
   functions = "functions"
 
 [dev]
-  framework = "{get_framework_name(framework)}"
-  command = "{get_dev_command(framework)}"
+  framework = "{name}"
+  command = "{dev}"
   port = 3000
   targetPort = 3000
 
@@ -1103,42 +1203,38 @@ def create_netlify_config(framework: str) -> GeneratedFile:
   from = "/*"
   to = "/index.html"
   status = 200
-"""
-    
-    return GeneratedFile(path="netlify.toml", content=config.strip())
+""".strip()
+
+@_memoize_file
+def create_netlify_config(framework: str) -> GeneratedFile:
+    """Creates Netlify configuration file"""
+    return GeneratedFile(path="netlify.toml", content=_NETLIFY_TEMPLATE.format(**_framework_meta(framework)))
+
+_VERCEL_CONFIG = {
+    "version": 2,
+    "builds": [
+        {
+            "src": "package.json",
+            "use": "@vercel/next"
+        }
+    ],
+    "routes": [
+        {
+            "handle": "filesystem"
+        },
+        {
+            "src": "/(.*)",
+            "dest": "/$1"
+        }
+    ]
+}
+_VERCEL_JSON = orjson.dumps(_VERCEL_CONFIG, option=orjson.OPT_INDENT_2).decode()
 
 def create_vercel_config() -> GeneratedFile:
     """Creates Vercel configuration file"""
-    config = {
-        "version": 2,
-        "builds": [
-            {
-                "src": "package.json",
-                "use": "@vercel/next"
-            }
-        ],
-        "routes": [
-            {
-                "handle": "filesystem"
-            },
-            {
-                "src": "/(.*)",
-                "dest": "/$1"
-            }
-        ]
-    }
-    
-    return GeneratedFile(
-        path="vercel.json",
-        content=json.dumps(config, indent=2)
-    )
+    return GeneratedFile(path="vercel.json", content=_VERCEL_JSON)
 
-def create_dockerfile(framework: str) -> GeneratedFile:
-    """Creates Docker configuration file"""
-    framework = framework.lower()
-    
-    if framework in ["react", "nextjs", "vue", "svelte"]:
-        content = """# Build stage
+_SPA_DOCKERFILE = """# Build stage
 FROM node:18-alpine AS builder
 WORKDIR /app
 COPY package*.json ./
@@ -1152,71 +1248,75 @@ COPY --from=builder /app/build /usr/share/nginx/html
 COPY nginx.conf /etc/nginx/nginx.conf
 EXPOSE 80
 CMD ["nginx", "-g", "daemon off;"]
-"""
-    elif framework in ["nodejs", "express"]:
-        content = """FROM node:18-alpine
+""".strip()
+
+_NODE_DOCKERFILE = """FROM node:18-alpine
 WORKDIR /app
 COPY package*.json ./
 RUN npm ci --only=production
 COPY . .
 EXPOSE 3000
 CMD ["npm", "start"]
-"""
-    elif framework in ["python", "flask", "fastapi"]:
-        content = """FROM python:3.11-slim
+""".strip()
+
+_PYTHON_DOCKERFILE = """FROM python:3.11-slim
 WORKDIR /app
 COPY requirements.txt .
 RUN pip install -r requirements.txt
 COPY . .
 EXPOSE 8000
 CMD ["python", "main.py"]
-"""
-    else:
-        content = """# Generic Dockerfile
+""".strip()
+
+_GENERIC_DOCKERFILE = """# Generic Dockerfile
 FROM alpine:latest
 WORKDIR /app
 COPY . .
 EXPOSE 8080
 CMD ["echo", "Please customize this Dockerfile for your specific framework"]
-"""
-    
-    return GeneratedFile(path="Dockerfile", content=content.strip())
+""".strip()
+
+_DOCKERFILES = {
+    **dict.fromkeys(("react", "nextjs", "vue", "svelte"), _SPA_DOCKERFILE),
+    **dict.fromkeys(("nodejs", "express"), _NODE_DOCKERFILE),
+    **dict.fromkeys(("python", "flask", "fastapi"), _PYTHON_DOCKERFILE),
+}
+
+def create_dockerfile(framework: str) -> GeneratedFile:
+    """Creates Docker configuration file"""
+    return GeneratedFile(path="Dockerfile", content=_DOCKERFILES.get(_canon(framework), _GENERIC_DOCKERFILE))
+
+_REQUIREMENTS: Dict[str, str] = {k: "\n".join(v) for k, v in {
+    "python": [
+        "flask==2.3.2",
+        "python-dotenv==1.0.0",
+        "flask-cors==4.0.0"
+    ],
+    "django": [
+        "django==4.2.0",
+        "djangorestframework==3.14.0",
+        "python-dotenv==1.0.0"
+    ],
+    "flask": [
+        "flask==2.3.2",
+        "flask-cors==4.0.0",
+        "python-dotenv==1.0.0",
+        "flask-sqlalchemy==3.0.0"
+    ],
+    "fastapi": [
+        "fastapi==0.95.2",
+        "uvicorn==0.22.0",
+        "python-dotenv==1.0.0",
+        "pydantic==1.10.0"
+    ]
+}.items()}
+_DEFAULT_REQUIREMENTS = "flask==2.3.2"
 
 def create_requirements_txt(framework: str) -> GeneratedFile:
     """Creates requirements.txt for Python projects"""
-    requirements = {
-        "python": [
-            "flask==2.3.2",
-            "python-dotenv==1.0.0",
-            "flask-cors==4.0.0"
-        ],
-        "django": [
-            "django==4.2.0",
-            "djangorestframework==3.14.0",
-            "python-dotenv==1.0.0"
-        ],
-        "flask": [
-            "flask==2.3.2",
-            "flask-cors==4.0.0",
-            "python-dotenv==1.0.0",
-            "flask-sqlalchemy==3.0.0"
-        ],
-        "fastapi": [
-            "fastapi==0.95.2",
-            "uvicorn==0.22.0",
-            "python-dotenv==1.0.0",
-            "pydantic==1.10.0"
-        ]
-    }
-    
-    return GeneratedFile(
-        path="requirements.txt",
-        content="\n".join(requirements.get(framework, ["flask==2.3.2"]))
-    )
+    return GeneratedFile(path="requirements.txt", content=_REQUIREMENTS.get(framework, _DEFAULT_REQUIREMENTS))
 
-def create_go_mod(framework: str) -> GeneratedFile:
-    """Creates go.mod for Go projects"""
-    content = """module generated-project
+_GO_MOD = """module generated-project
 
 go 1.19
 
@@ -1224,13 +1324,13 @@ require (
     github.com/gin-gonic/gin v1.9.0
     github.com/joho/godotenv v1.4.0
 )
-"""
-    
-    return GeneratedFile(path="go.mod", content=content.strip())
+""".strip()
 
-def create_pom_xml(framework: str) -> GeneratedFile:
-    """Creates pom.xml for Java projects"""
-    content = """<?xml version="1.0" encoding="UTF-8"?>
+def create_go_mod(framework: str) -> GeneratedFile:
+    """Creates go.mod for Go projects"""
+    return GeneratedFile(path="go.mod", content=_GO_MOD)
+
+_POM_XML = """<?xml version="1.0" encoding="UTF-8"?>
 <project xmlns="http://maven.apache.org/POM/4.0.0"
          xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
          xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 
@@ -1267,13 +1367,13 @@ def create_pom_xml(framework: str) -> GeneratedFile:
         </plugins>
     </build>
 </project>
-"""
-    
-    return GeneratedFile(path="pom.xml", content=content.strip())
+""".strip()
 
-def create_composer_json(framework: str) -> GeneratedFile:
-    """Creates composer.json for PHP projects"""
-    content = """{
+def create_pom_xml(framework: str) -> GeneratedFile:
+    """Creates pom.xml for Java projects"""
+    return GeneratedFile(path="pom.xml", content=_POM_XML)
+
+_COMPOSER_JSON = """{
     "name": "example/generated-project",
     "description": "Generated PHP project",
     "type": "project",
@@ -1288,13 +1388,13 @@ def create_composer_json(framework: str) -> GeneratedFile:
         }
     }
 }
-"""
-    
-    return GeneratedFile(path="composer.json", content=content.strip())
+""".strip()
 
-def create_env_validation() -> GeneratedFile:
-    """Creates environment validation for Node.js projects"""
-    content = """const Joi = require('joi');
+def create_composer_json(framework: str) -> GeneratedFile:
+    """Creates composer.json for PHP projects"""
+    return GeneratedFile(path="composer.json", content=_COMPOSER_JSON)
+
+_ENV_VALIDATION_JS = """const Joi = require('joi');
 
 const envSchema = Joi.object({
   NODE_ENV: Joi.string()
@@ -1313,86 +1413,111 @@ if (error) {
 }
 
 module.exports = envVars;
-"""
-    
-    return GeneratedFile(path="config/env.js", content=content.strip())
+""".strip()
+
+def create_env_validation() -> GeneratedFile:
+    """Creates environment validation for Node.js projects"""
+    return GeneratedFile(path="config/env.js", content=_ENV_VALIDATION_JS)
+
+# (path, factory) pairs ensure_framework_requirements adds when missing.
+# Declared after the factories they reference.
+_JS_REQUIRED = (("package.json", create_package_json),)
+_NODE_REQUIRED = (("package.json", create_package_json), (".env.example", create_env_example))
+_PYTHON_REQUIRED = (("requirements.txt", create_requirements_txt), (".env.example", create_env_example))
+_REQUIRED_BY_FRAMEWORK = {
+    **dict.fromkeys(("react", "nextjs", "vue", "angular", "svelte"), _JS_REQUIRED),
+    **dict.fromkeys(("nodejs", "express"), _NODE_REQUIRED),
+    **dict.fromkeys(("python", "django", "flask", "fastapi"), _PYTHON_REQUIRED),
+    "go": (("go.mod", create_go_mod),),
+    "java": (("pom.xml", create_pom_xml),),
+    "php": (("composer.json", create_composer_json),),
+}
+_FULLSTACK_REQUIRED = _JS_REQUIRED
+_UNIVERSAL_REQUIRED = (("README.md", create_readme), (".gitignore", create_gitignore))
 
 # Helper functions for deployment configuration
+_FRAMEWORK_META: Dict[str, Dict[str, str]] = {
+    "nextjs": {"build": "npm run build", "publish": ".next", "dev": "npm run dev", "name": "nextjs"},
+    "react": {"build": "CI= npm run build", "publish": "build", "dev": "npm start", "name": "create-react-app"},
+    "vue": {"build": "npm run build", "publish": "dist", "dev": "npm run dev", "name": "vue"},
+    "svelte": {"build": "npm run build", "publish": "dist", "dev": "npm run dev", "name": "svelte"},
+    "angular": {"build": "ng build", "publish": "dist", "dev": "ng serve", "name": "angular"},
+}
+_DEFAULT_FRAMEWORK_META = {
+    "build": "echo 'No build needed for static site'",
+    "publish": ".",
+    "dev": "echo 'No dev server needed'",
+    "name": "static",
+}
+
+def _framework_meta(framework: str) -> Dict[str, str]:
+    return _FRAMEWORK_META.get(_canon(framework), _DEFAULT_FRAMEWORK_META)
+
 def get_build_command(framework: str) -> str:
-    framework = framework.lower()
-    if framework == "nextjs":
-        return "npm run build"
-    elif framework == "react":
-        return "CI= npm run build"
-    elif framework in ["vue", "svelte"]:
-        return "npm run build"
-    elif framework == "angular":
-        return "ng build"
-    else:
-        return "echo 'No build needed for static site'"
+    return _framework_meta(framework)["build"]
 
 def get_publish_dir(framework: str) -> str:
-    framework = framework.lower()
-    if framework == "nextjs":
-        return ".next"
-    elif framework == "react":
-        return "build"
-    elif framework in ["vue", "svelte"]:
-        return "dist"
-    elif framework == "angular":
-        return "dist"
-    else:
-        return "."
+    return _framework_meta(framework)["publish"]
 
 def get_dev_command(framework: str) -> str:
-    framework = framework.lower()
-    if framework == "nextjs":
-        return "npm run dev"
-    elif framework == "react":
-        return "npm start"
-    elif framework in ["vue", "svelte"]:
-        return "npm run dev"
-    elif framework == "angular":
-        return "ng serve"
-    else:
-        return "echo 'No dev server needed'"
+    return _framework_meta(framework)["dev"]
 
 def get_framework_name(framework: str) -> str:
-    framework = framework.lower()
-    if framework == "nextjs":
-        return "nextjs"
-    elif framework == "react":
-        return "create-react-app"
-    elif framework == "vue":
-        return "vue"
-    elif framework == "svelte":
-        return "svelte"
-    elif framework == "angular":
-        return "angular"
-    else:
-        return "static"
+    return _framework_meta(framework)["name"]
+
+# A block ends at its closing fence or, when the model forgot the fence, at
+# the next "file:" header. \s* absorbs CRLF endings and blank lines.
+_FILE_BLOCK_RE = re.compile(r"^file:\s*([^\n]+?)\s*\n\s*```[^\n]*\n(.*?)(?:^```|(?=^file:))", re.DOTALL | re.MULTILINE)
+# Fallback for a last block that is never closed
+_TRAILING_BLOCK_RE = re.compile(r"^file:\s*([^\n]+?)\s*\n\s*```[^\n]*\n(.*)", re.DOTALL | re.MULTILINE)
+
+class StreamingFileParser:
+    """Incremental parse_generated_files for streamed responses.
+
+    feed() takes raw text chunks and returns the files whose closing fence
+    has arrived; close() returns anything still complete in the buffer.
+    """
+
+    def __init__(self):
+        # Chunks are collected in a list and joined only when a block may have
+        # completed, rather than re-copying the whole buffer on every +=
+        self._chunks = []
+
+    def feed(self, chunk: str) -> List[GeneratedFile]:
+        self._chunks.append(chunk)
+        # A block can only complete on a chunk carrying its closing backticks
+        if "`" not in chunk:
+            return []
+        return self._drain()
+
+    def close(self) -> List[GeneratedFile]:
+        files = self._drain()
+        files.extend(_parse_trailing_block("".join(self._chunks), 0))
+        self._chunks = []
+        return files
+
+    def _drain(self) -> List[GeneratedFile]:
+        buffer = "".join(self._chunks)
+        files = []
+        end = 0
+        for match in _FILE_BLOCK_RE.finditer(buffer):
+            files.append(GeneratedFile(path=match.group(1), content=match.group(2).strip()))
+            end = match.end()
+        self._chunks = [buffer[end:]] if end < len(buffer) else []
+        return files
+
+def _parse_trailing_block(text: str, pos: int) -> List[GeneratedFile]:
+    match = _TRAILING_BLOCK_RE.search(text, pos)
+    if match is None:
+        return []
+    return [GeneratedFile(path=match.group(1), content=match.group(2).strip())]
 
 def parse_generated_files(text: str) -> List[GeneratedFile]:
     """Enhanced file parsing with better error handling"""
     files = []
-    current_file = None
-    current_content = ""
-    in_code_block = False
-    
-    for line in text.splitlines():
-        if line.startswith("file:"):
-            if current_file:
-                files.append(GeneratedFile(path=current_file, content=current_content.strip()))
-            path = line.split(":", 1)[1].strip()
-            current_file = path
-            current_content = ""
-            in_code_block = False
-        elif line.startswith("```") and current_file:
-            in_code_block = not in_code_block
-        elif current_file and in_code_block:
-            current_content += line + "\n"
-    
-    if current_file:
-        files.append(GeneratedFile(path=current_file, content=current_content.strip()))
-    
+    end = 0
+    for match in _FILE_BLOCK_RE.finditer(text):
+        files.append(GeneratedFile(path=match.group(1), content=match.group(2).strip()))
+        end = match.end()
+    files.extend(_parse_trailing_block(text, end))
     return files
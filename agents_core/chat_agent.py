@@ -1,96 +1,137 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
-import base64
-from typing import Optional
+import re
+import asyncio
+import functools
+import logging
+from typing import AsyncIterator, Optional
+from utils.gemini_utils import configure_gemini
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    # Configure and build the client once per process instead of on every request
+    return configure_gemini().GenerativeModel('gemini-2.0-flash')
 
 def initialize_gemini():
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    return genai.GenerativeModel('gemini-2.0-flash')
+    return _get_model()
+
+_VISION_PROMPT_TEMPLATE = """
+You are CodeFusion AI, an expert coding assistant. The user has uploaded an image and asked: "{message}"
+
+Please analyze the image and provide helpful insights. You can:
+1. Describe what you see in the image
+2. If it's code/screenshot, help debug or explain it
+3. If it's a design/mockup, suggest how to implement it
+4. If it's an error message, provide solutions
+5. Generate code based on what you see
+
+Be helpful, detailed, and provide actionable advice.
+"""
+
+_TEXT_SYSTEM_PROMPT = """
+You are CodeFusion AI, an expert coding assistant and creative AI. You help developers with:
+
+1. **Code Generation**: Create websites, apps, APIs in any language/framework
+2. **Code Review**: Analyze and improve existing code
+3. **Debugging**: Find and fix issues in code
+4. **Architecture**: Design system architecture and best practices
+5. **Learning**: Explain programming concepts clearly
+6. **Image Generation**: Create custom images for projects
+
+Always provide:
+- Clear, actionable solutions
+- Code examples when relevant
+- Best practices and explanations
+- Professional, helpful tone
+
+If asked to generate images, provide detailed descriptions of what would be created.
+"""
+
+_IMAGE_SYSTEM_PROMPT = """
+You are CodeFusion AI's image generation assistant. The user wants to generate an image.
+
+Provide a response that includes:
+1. A detailed description of what the image would look like based on their prompt
+2. Suggested improvements to their prompt for better results
+3. Technical specifications (recommended dimensions, style, etc.)
+4. Alternative approaches or tools they could use
+
+Format your response as if you're actually generating the image, but explain that this is a description of what would be created.
+"""
+
+_INFLIGHT = {}
+
+def _sniff_image_mime(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+def _chat_parts(message: str, image_data: Optional[bytes]) -> list:
+    if not image_data:
+        # Text-only input; the constant system prompt goes as its own part
+        return [_TEXT_SYSTEM_PROMPT, f"User: {message}\n\nCodeFusion AI:"]
+    # Image + text input. The SDK wraps raw bytes in an inline Blob itself,
+    # so the upload is passed through without a base64 round-trip
+    return [
+        _VISION_PROMPT_TEMPLATE.format(message=message),
+        {"mime_type": _sniff_image_mime(image_data), "data": image_data},
+    ]
 
 async def generate_chat_response(message: str, image_data: Optional[bytes] = None) -> str:
     """
     Generate a chat response using Gemini AI
     """
-    model = initialize_gemini()
+    model = _get_model()
     
     try:
+        parts = _chat_parts(message, image_data)
         if image_data:
-            # Handle image + text input
-            image_part = {
-                "mime_type": "image/jpeg",  # Assume JPEG for now
-                "data": base64.b64encode(image_data).decode()
-            }
-            
-            prompt = f"""
-            You are CodeFusion AI, an expert coding assistant. The user has uploaded an image and asked: "{message}"
-            
-            Please analyze the image and provide helpful insights. You can:
-            1. Describe what you see in the image
-            2. If it's code/screenshot, help debug or explain it
-            3. If it's a design/mockup, suggest how to implement it
-            4. If it's an error message, provide solutions
-            5. Generate code based on what you see
-            
-            Be helpful, detailed, and provide actionable advice.
-            """
-            
-            response = await model.generate_content_async([prompt, image_part])
+            response = await model.generate_content_async(parts)
         else:
-            # Handle text-only input
-            system_prompt = """
-            You are CodeFusion AI, an expert coding assistant and creative AI. You help developers with:
-            
-            1. **Code Generation**: Create websites, apps, APIs in any language/framework
-            2. **Code Review**: Analyze and improve existing code
-            3. **Debugging**: Find and fix issues in code
-            4. **Architecture**: Design system architecture and best practices
-            5. **Learning**: Explain programming concepts clearly
-            6. **Image Generation**: Create custom images for projects
-            
-            Always provide:
-            - Clear, actionable solutions
-            - Code examples when relevant
-            - Best practices and explanations
-            - Professional, helpful tone
-            
-            If asked to generate images, provide detailed descriptions of what would be created.
-            """
-            
-            enhanced_prompt = f"{system_prompt}\n\nUser: {message}\n\nCodeFusion AI:"
-            response = await model.generate_content_async(enhanced_prompt)
+            # Identical text messages already in flight share one call, shielded
+            # so one client disconnecting doesn't cancel it for the others
+            task = _INFLIGHT.get(message)
+            if task is None:
+                task = asyncio.ensure_future(model.generate_content_async(parts))
+                _INFLIGHT[message] = task
+                task.add_done_callback(lambda _: _INFLIGHT.pop(message, None))
+            response = await asyncio.shield(task)
         
         return response.text
         
-    except Exception as e:
-        print(f"Error generating chat response: {str(e)}")
+    except Exception:
+        logger.exception("Error generating chat response")
         return "I apologize, but I'm having trouble processing your request right now. Please try again in a moment."
 
+async def stream_chat_response(message: str, image_data: Optional[bytes] = None) -> AsyncIterator[str]:
+    """
+    Stream a chat response from Gemini AI as text chunks while it is generated
+    """
+    model = _get_model()
+    
+    try:
+        parts = _chat_parts(message, image_data)
+        response = await model.generate_content_async(parts, stream=True)
+        async for chunk in response:
+            yield chunk.text
+    except Exception:
+        logger.exception("Error streaming chat response")
+        yield "I apologize, but I'm having trouble processing your request right now. Please try again in a moment."
+
 async def generate_image_response(prompt: str) -> dict:
     """
     Generate an image using AI (placeholder implementation)
     """
     try:
-        model = initialize_gemini()
+        model = _get_model()
 
         # For now, we'll provide a detailed description and suggest tools
         # In a real implementation, you would integrate with DALL-E, Midjourney, or Stable Diffusion
-        system_prompt = """
-        You are CodeFusion AI's image generation assistant. The user wants to generate an image.
-
-        Provide a response that includes:
-        1. A detailed description of what the image would look like based on their prompt
-        2. Suggested improvements to their prompt for better results
-        3. Technical specifications (recommended dimensions, style, etc.)
-        4. Alternative approaches or tools they could use
-
-        Format your response as if you're actually generating the image, but explain that this is a description of what would be created.
-        """
-
-        enhanced_prompt = f"{system_prompt}\n\nUser wants to generate: {prompt}\n\nResponse:"
-        response = await model.generate_content_async(enhanced_prompt)
+        response = await model.generate_content_async([_IMAGE_SYSTEM_PROMPT, f"User wants to generate: {prompt}\n\nResponse:"])
 
         # Return both text response and a placeholder image URL
         return {
@@ -99,29 +140,33 @@ async def generate_image_response(prompt: str) -> dict:
             "isImageGeneration": True
         }
 
-    except Exception as e:
-        print(f"Error generating image response: {str(e)}")
+    except Exception:
+        logger.exception("Error generating image response")
         return {
             "text": "I apologize, but I'm having trouble with image generation right now. Please try again later.",
             "imageUrl": None,
             "isImageGeneration": True
         }
 
+def _keyword_pattern(keywords):
+    # Anchored at word starts so "how" doesn't fire on "show" or "api" on "rapid",
+    # while plurals and suffixes ("errors", "drawing") still match
+    return re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + ")", re.IGNORECASE)
+
+# Checked in order; the first group with a match wins
+_INTENT_PATTERNS = [
+    ('image_generation', _keyword_pattern(['generate image', 'create image', 'make image', 'draw', 'picture'])),
+    ('web_development', _keyword_pattern(['website', 'web app', 'frontend', 'react', 'vue', 'angular'])),
+    ('backend_development', _keyword_pattern(['api', 'backend', 'server', 'database'])),
+    ('debugging', _keyword_pattern(['debug', 'error', 'fix', 'problem', 'issue'])),
+    ('learning', _keyword_pattern(['explain', 'how', 'what', 'why', 'learn'])),
+]
+
 def analyze_message_intent(message: str) -> str:
     """
     Analyze the user's message to determine intent
     """
-    message_lower = message.lower()
-    
-    if any(keyword in message_lower for keyword in ['generate image', 'create image', 'make image', 'draw', 'picture']):
-        return 'image_generation'
-    elif any(keyword in message_lower for keyword in ['website', 'web app', 'frontend', 'react', 'vue', 'angular']):
-        return 'web_development'
-    elif any(keyword in message_lower for keyword in ['api', 'backend', 'server', 'database']):
-        return 'backend_development'
-    elif any(keyword in message_lower for keyword in ['debug', 'error', 'fix', 'problem', 'issue']):
-        return 'debugging'
-    elif any(keyword in message_lower for keyword in ['explain', 'how', 'what', 'why', 'learn']):
-        return 'learning'
-    else:
-        return 'general'
+    for intent, pattern in _INTENT_PATTERNS:
+        if pattern.search(message):
+            return intent
+    return 'general'
@@ -1,349 +1,317 @@
-import os
-from typing import List, Dict, Any
-from pydantic import BaseModel
-import google.generativeai as genai
-from dotenv import load_dotenv
-import json
-
-load_dotenv()
-
-class FullstackProject(BaseModel):
-    frontend_files: List[Dict[str, str]]
-    backend_files: List[Dict[str, str]]
-    database_files: List[Dict[str, str]]
-    deployment_files: List[Dict[str, str]]
-    documentation_files: List[Dict[str, str]]
-
-class FullstackGenerationResult(BaseModel):
+import asyncio
+import functools
+import logging
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, replace
+import orjson
+import hashlib
+from utils.gemini_utils import configure_gemini
+from utils.llm_cache import LLMCache, embed_prompt
+
+logger = logging.getLogger(__name__)
+
+# One generated file. Much smaller than a {"path", "content"} dict; routes turn
+# them back into dicts (._asdict()) at the API boundary
+class FileData(NamedTuple):
+    path: str
+    content: str
+
+# Built only from our own parser output, so plain frozen dataclasses rather than
+# validated pydantic models; cached results are shared between requests
+@dataclass(slots=True, frozen=True)
+class FullstackProject:
+    frontend_files: List[FileData]
+    backend_files: List[FileData]
+    database_files: List[FileData]
+    deployment_files: List[FileData]
+    documentation_files: List[FileData]
+
+@dataclass(slots=True, frozen=True)
+class FullstackGenerationResult:
     success: bool
     project: FullstackProject
     setup_instructions: str
     deployment_guide: str
+    # Set only for failures the user can act on (e.g. a project too large to
+    # generate in one response); other failures leave it None
+    error: Optional[str] = None
+
+# The constant part of the instructions is the model's system_instruction, so
+# it is an identical prefix on every call that the provider can reuse
+_SYSTEM_PROMPT = """
+You are an expert full-stack developer creating production-ready, professional web applications.
+
+Build a COMPLETE, WORKING, immediately deployable application that has:
+1. A beautiful, responsive frontend with routing, state management and UI components
+2. A backend API with proper architecture, integrated with the frontend
+3. Database models, schemas and migrations
+4. Authentication, authorization, input validation and error handling
+5. CORS and security headers
+6. Unit, integration and API tests
+7. Deployment setup: Docker, environment configs, CI/CD
+8. Documentation and setup instructions
+
+RESPONSE FORMAT: return every file of the project as {"path", "content"} in the list for its role:
+frontend_files, backend_files, database_files, deployment_files (Docker, CI, hosting config) or documentation_files.
+"""
 
+# Bucket names; each maps to the FullstackProject field "<name>_files"
+_BUCKETS = ("frontend", "backend", "database", "deployment", "documentation")
+
+# Gemini's JSON mode returns the project already split into buckets, so the
+# response needs no file-marker parsing or path-based categorization
+_FILES_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"path": {"type": "STRING"}, "content": {"type": "STRING"}},
+        "required": ["path", "content"],
+    },
+}
+_PROJECT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {f"{bucket}_files": _FILES_SCHEMA for bucket in _BUCKETS},
+    "required": [f"{bucket}_files" for bucket in _BUCKETS],
+}
+
+# Shared failure result; frozen, and the empty buckets are tuples
+_EMPTY_RESULT = FullstackGenerationResult(
+    success=False,
+    project=FullstackProject(**{f"{bucket}_files": () for bucket in _BUCKETS}),
+    setup_instructions="",
+    deployment_guide=""
+)
+
+# A response cut off at the output limit is unparseable JSON, so the limit is
+# pinned to gemini-2.0-flash's maximum rather than left to the default
+MAX_OUTPUT_TOKENS = 8192
+
+_TRUNCATED_RESULT = replace(
+    _EMPTY_RESULT,
+    error="The requested project is too large to generate in one response. "
+          "Try a smaller scope (fewer pages or features) and add the rest as edits."
+)
+
+@functools.lru_cache(maxsize=1)
 def initialize_gemini():
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    return genai.GenerativeModel('gemini-2.0-flash')
+    return configure_gemini().GenerativeModel(
+        'gemini-2.0-flash',
+        system_instruction=_SYSTEM_PROMPT,
+        generation_config={
+            "response_mime_type": "application/json",
+            "response_schema": _PROJECT_SCHEMA,
+            "max_output_tokens": MAX_OUTPUT_TOKENS,
+        },
+    )
 
-async def generate_fullstack_project(prompt: str, frontend_framework: str, backend_framework: str, database_type: str = "sqlite") -> FullstackGenerationResult:
-    """
-    Generate a complete full-stack project with frontend, backend, and database integration
+_RESULT_CACHE = LLMCache()
+
+def _cache_key(prompt: str, frontend_framework: str, backend_framework: str, database_type: str) -> str:
+    payload = orjson.dumps({
+        "p": " ".join(prompt.split()).lower(),
+        "f": frontend_framework.lower(),
+        "b": backend_framework.lower(),
+        "d": database_type.lower(),
+    }, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+async def generate_fullstack_project(prompt: str, frontend_framework: str, backend_framework: str, database_type: str = "sqlite",
+                                     similarity_text: Optional[str] = None) -> FullstackGenerationResult:
     """
-    model = initialize_gemini()
-    
-    system_prompt = f"""
-    You are an expert full-stack developer specializing in creating production-ready, professional web applications.
-    
-    FRONTEND FRAMEWORK: {frontend_framework}
-    BACKEND FRAMEWORK: {backend_framework}
-    DATABASE: {database_type}
-    
-    CRITICAL REQUIREMENTS:
-    1. Create a COMPLETE, WORKING full-stack application
-    2. Frontend and backend must be properly integrated
-    3. Include proper API endpoints and data flow
-    4. Add comprehensive error handling and validation
-    5. Include proper authentication and authorization
-    6. Add database models and schemas
-    7. Include proper CORS and security headers
-    8. Add comprehensive testing setup
-    9. Include proper deployment configurations
-    10. Add detailed documentation and setup instructions
-    
-    PROJECT STRUCTURE:
-    - Frontend: Complete {frontend_framework} application with routing, state management, and UI components
-    - Backend: Complete {backend_framework} API with proper architecture
-    - Database: {database_type} setup with models and migrations
-    - Integration: Proper API communication between frontend and backend
-    - Security: Authentication, authorization, input validation
-    - Testing: Unit tests, integration tests, API tests
-    - Deployment: Docker, environment configs, CI/CD setup
-    
-    RESPONSE FORMAT:
-    You must respond with files in this exact format:
-    
-    file:frontend/src/App.jsx
-    ```jsx
-    // Your React component code here
-    ```
-    
-    file:backend/app.py
-    ```python
-    # Your Python backend code here
-    ```
-    
-    file:database/schema.sql
-    ```sql
-    -- Your database schema here
-    ```
-    
-    Continue with all necessary files. Each file must start with "file:" followed by the path, then a code block.
-    
-    Return the complete project structure with all necessary files.
+    Generate a complete full-stack project with frontend, backend, and database integration.
+    similarity_text is the user's own request, used to reuse results for near-duplicates;
+    leave it out when prompt wraps the request in instructions (image requests)
     """
-    
-    try:
-        # Enhanced user prompt for full-stack generation
-        enhanced_prompt = f"""
-        User Request: {prompt}
-        
-        Please create a professional, complete full-stack web application that:
-        1. Has a beautiful, responsive frontend using {frontend_framework}
-        2. Includes a robust backend API using {backend_framework}
-        3. Integrates with {database_type} database
-        4. Has proper user authentication and authorization
-        5. Includes comprehensive error handling and validation
-        6. Is production-ready and deployable
-        7. Follows current web development best practices
-        8. Has proper security measures
-        9. Includes comprehensive testing
-        10. Has detailed documentation
-        
-        The application should be immediately functional and demonstrate proper full-stack architecture.
-        """
-        
-        response = await model.generate_content_async(system_prompt + "\n\n" + enhanced_prompt)
-        
-        # Parse the response and create project structure
-        project = parse_fullstack_response(response.text, frontend_framework, backend_framework, database_type)
-        
-        # Generate setup and deployment instructions
-        setup_instructions = generate_setup_instructions(frontend_framework, backend_framework, database_type)
-        deployment_guide = generate_deployment_guide(frontend_framework, backend_framework, database_type)
-        
-        return FullstackGenerationResult(
-            success=True,
-            project=project,
-            setup_instructions=setup_instructions,
-            deployment_guide=deployment_guide
-        )
-        
-    except Exception as e:
-        print(f"Full-stack generation error: {str(e)}")
-        return FullstackGenerationResult(
-            success=False,
-            project=FullstackProject(
-                frontend_files=[],
-                backend_files=[],
-                database_files=[],
-                deployment_files=[],
-                documentation_files=[]
-            ),
-            setup_instructions="",
-            deployment_guide=""
-        )
-
-def parse_fullstack_response(response_text: str, frontend_framework: str, backend_framework: str, database_type: str) -> FullstackProject:
+    # Exact repeats and near-duplicate requests for the same stack skip Gemini entirely
+    cache_key = _cache_key(prompt, frontend_framework, backend_framework, database_type)
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    scope = (frontend_framework.lower(), backend_framework.lower(), database_type.lower())
+    vector = await embed_prompt(similarity_text) if similarity_text else None
+    if vector is not None:
+        cached = _RESULT_CACHE.find_similar(scope, vector)
+        if cached is not None:
+            return cached
+
+    result = await _generate_project(prompt, frontend_framework, backend_framework, database_type)
+    if result.success:
+        _RESULT_CACHE.set(cache_key, result, scope=scope, vector=vector)
+    return result
+
+async def generate_fullstack_projects_batch(specs: List[Tuple[str, str, str, str]], max_concurrency: int = 8) -> List[FullstackGenerationResult]:
     """
-    Parse the AI response and organize files by category
+    Generate several (prompt, frontend, backend, database) projects concurrently.
+    Results come back in input order; at most max_concurrency Gemini calls run at once.
     """
-    # This is a simplified parser - in production, you'd want more sophisticated parsing
-    lines = response_text.split('\n')
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(spec):
+        async with semaphore:
+            return await generate_fullstack_project(*spec, similarity_text=spec[0])
+
+    return await asyncio.gather(*(run(spec) for spec in specs))
+
+def _prompt_parts(prompt: str, frontend_framework: str, backend_framework: str, database_type: str) -> List[str]:
+    # Only the stack and the user's request are sent per call
+    system_prompt = f"FRONTEND FRAMEWORK: {frontend_framework}\nBACKEND FRAMEWORK: {backend_framework}\nDATABASE: {database_type}"
+    enhanced_prompt = f"User Request: {prompt}"
     
-    frontend_files = []
-    backend_files = []
-    database_files = []
-    deployment_files = []
-    documentation_files = []
+    return [system_prompt, enhanced_prompt]
+
+async def _generate_project(prompt: str, frontend_framework: str, backend_framework: str, database_type: str) -> FullstackGenerationResult:
+    model = initialize_gemini()
     
-    current_file = None
-    current_content = ""
-    in_code_block = False
+    # Only API failures and junk output (blocked/unparseable responses, files
+    # missing fields) become a failed result; bugs in our own code, including
+    # the essential-file templates, still raise
+    try:
+        response = await model.generate_content_async(_prompt_parts(prompt, frontend_framework, backend_framework, database_type))
+        if response.candidates and getattr(response.candidates[0].finish_reason, "name", None) == "MAX_TOKENS":
+            logger.warning("Full-stack generation hit the %s-token output limit", MAX_OUTPUT_TOKENS)
+            return _TRUNCATED_RESULT
+        buckets = _parse_buckets(response.text)
+    except _generation_errors() as e:
+        logger.error("Full-stack generation error: %s", e)
+        return _EMPTY_RESULT
     
-    for line in lines:
-        if line.startswith("file:"):
-            if current_file:
-                # Categorize the file based on path and content
-                file_data = {"path": current_file, "content": current_content.strip()}
-                categorize_file(file_data, frontend_files, backend_files, database_files, deployment_files, documentation_files)
-            
-            path = line.split(":", 1)[1].strip()
-            current_file = path
-            current_content = ""
-            in_code_block = False
-            
-        elif line.startswith("```") and current_file:
-            in_code_block = not in_code_block
-            
-        elif current_file and in_code_block:
-            current_content += line + "\n"
+    project = _build_project(buckets, frontend_framework, backend_framework, database_type)
     
-    # Don't forget the last file
-    if current_file:
-        file_data = {"path": current_file, "content": current_content.strip()}
-        categorize_file(file_data, frontend_files, backend_files, database_files, deployment_files, documentation_files)
+    # Generate setup and deployment instructions
+    setup_instructions = generate_setup_instructions(frontend_framework, backend_framework, database_type)
+    deployment_guide = generate_deployment_guide(frontend_framework, backend_framework, database_type)
     
+    return FullstackGenerationResult(
+        success=True,
+        project=project,
+        setup_instructions=setup_instructions,
+        deployment_guide=deployment_guide
+    )
+
+@functools.lru_cache(maxsize=1)
+def _generation_errors():
+    from google.api_core.exceptions import GoogleAPIError
+    # orjson.JSONDecodeError and blocked-response .text errors are ValueErrors
+    return (GoogleAPIError, ValueError, KeyError, TypeError)
+
+def _new_buckets() -> Dict[str, Dict[str, FileData]]:
+    # Files are keyed by path within each bucket, so the essential-file checks
+    # are dict lookups; a repeated path keeps the later entry, as writing
+    # them to disk in order would
+    return {bucket: {} for bucket in _BUCKETS}
+
+def _build_project(buckets: Dict[str, Dict[str, FileData]], frontend_framework: str, backend_framework: str, database_type: str) -> FullstackProject:
     # Ensure essential files are present
-    ensure_essential_files(frontend_files, backend_files, database_files, deployment_files, documentation_files, 
-                          frontend_framework, backend_framework, database_type)
+    ensure_essential_files(buckets, frontend_framework, backend_framework, database_type)
     
-    return FullstackProject(
-        frontend_files=frontend_files,
-        backend_files=backend_files,
-        database_files=database_files,
-        deployment_files=deployment_files,
-        documentation_files=documentation_files
-    )
+    return FullstackProject(**{f"{bucket}_files": list(buckets[bucket].values()) for bucket in _BUCKETS})
+
+def _parse_buckets(response_text: str) -> Dict[str, Dict[str, FileData]]:
+    # Only the JSON decode and schema-shaped lookups happen here, so malformed
+    # model output is the only thing the caller's error handling can catch
+    data = orjson.loads(response_text)
+    buckets = _new_buckets()
+    for bucket in _BUCKETS:
+        files = buckets[bucket]
+        for file_data in data.get(f"{bucket}_files", ()):
+            files[file_data["path"]] = FileData(file_data["path"], file_data["content"])
+    return buckets
 
-def categorize_file(file_data: Dict[str, str], frontend_files: List, backend_files: List, database_files: List, 
-                   deployment_files: List, documentation_files: List):
+def parse_fullstack_response(response_text: str, frontend_framework: str, backend_framework: str, database_type: str) -> FullstackProject:
     """
-    Categorize a file based on its path and content
+    Load the model's JSON response into a project and add missing essential files
     """
-    path = file_data["path"].lower()
-    
-    # Frontend files
-    if any(ext in path for ext in ['.html', '.jsx', '.tsx', '.vue', '.svelte', '.css', '.scss', '.sass']):
-        frontend_files.append(file_data)
-    # Backend files
-    elif any(ext in path for ext in ['.py', '.js', '.ts', '.go', '.java', '.php']):
-        backend_files.append(file_data)
-    # Database files
-    elif any(ext in path for ext in ['.sql', '.db', '.sqlite', 'schema', 'migration']):
-        database_files.append(file_data)
-    # Deployment files
-    elif any(ext in path for ext in ['dockerfile', 'docker-compose', '.yml', '.yaml', 'vercel.json', 'netlify.toml']):
-        deployment_files.append(file_data)
-    # Documentation files
-    elif any(ext in path for ext in ['.md', 'readme', 'docs', 'api']):
-        documentation_files.append(file_data)
-    # Default to backend for unknown file types
-    else:
-        backend_files.append(file_data)
-
-def ensure_essential_files(frontend_files: List, backend_files: List, database_files: List, 
-                          deployment_files: List, documentation_files: List,
+    return _build_project(_parse_buckets(response_text), frontend_framework, backend_framework, database_type)
+
+def ensure_essential_files(buckets: Dict[str, Dict[str, FileData]],
                           frontend_framework: str, backend_framework: str, database_type: str):
     """
     Ensure all essential files are present for a full-stack project
     """
     # Add missing essential files
-    add_missing_frontend_files(frontend_files, frontend_framework)
-    add_missing_backend_files(backend_files, backend_framework)
-    add_missing_database_files(database_files, database_type)
-    add_missing_deployment_files(deployment_files, frontend_framework, backend_framework)
-    add_missing_documentation_files(documentation_files, frontend_framework, backend_framework, database_type)
+    add_missing_frontend_files(buckets["frontend"], frontend_framework)
+    add_missing_backend_files(buckets["backend"], backend_framework)
+    add_missing_database_files(buckets["database"], database_type)
+    add_missing_deployment_files(buckets["deployment"], frontend_framework, backend_framework)
+    add_missing_documentation_files(buckets["documentation"], frontend_framework, backend_framework, database_type)
 
-def add_missing_frontend_files(frontend_files: List, framework: str):
+def add_missing_frontend_files(frontend_files: Dict[str, FileData], framework: str):
     """Add missing essential frontend files"""
-    existing_paths = [f["path"] for f in frontend_files]
+    if framework == "react" and "package.json" not in frontend_files:
+        frontend_files["package.json"] = FileData("package.json", create_react_package_json())
     
-    if framework == "react" and "package.json" not in existing_paths:
-        frontend_files.append({
-            "path": "package.json",
-            "content": create_react_package_json()
-        })
+    if framework == "nextjs" and "next.config.js" not in frontend_files:
+        frontend_files["next.config.js"] = FileData("next.config.js", create_nextjs_config())
     
-    if framework == "nextjs" and "next.config.js" not in existing_paths:
-        frontend_files.append({
-            "path": "next.config.js",
-            "content": create_nextjs_config()
-        })
-    
-    if framework == "vue" and "vite.config.js" not in existing_paths:
-        frontend_files.append({
-            "path": "vite.config.js",
-            "content": create_vue_vite_config()
-        })
+    if framework == "vue" and "vite.config.js" not in frontend_files:
+        frontend_files["vite.config.js"] = FileData("vite.config.js", create_vue_vite_config())
 
-def add_missing_backend_files(backend_files: List, framework: str):
+def add_missing_backend_files(backend_files: Dict[str, FileData], framework: str):
     """Add missing essential backend files"""
-    existing_paths = [f["path"] for f in backend_files]
-    
-    if framework == "nodejs" and "package.json" not in existing_paths:
-        backend_files.append({
-            "path": "package.json",
-            "content": create_nodejs_package_json()
-        })
+    if framework == "nodejs" and "package.json" not in backend_files:
+        backend_files["package.json"] = FileData("package.json", create_nodejs_package_json())
     
-    if framework == "python" and "requirements.txt" not in existing_paths:
-        backend_files.append({
-            "path": "requirements.txt",
-            "content": create_python_requirements()
-        })
+    if framework == "python" and "requirements.txt" not in backend_files:
+        backend_files["requirements.txt"] = FileData("requirements.txt", create_python_requirements())
     
-    if framework == "go" and "go.mod" not in existing_paths:
-        backend_files.append({
-            "path": "go.mod",
-            "content": create_go_mod()
-        })
+    if framework == "go" and "go.mod" not in backend_files:
+        backend_files["go.mod"] = FileData("go.mod", create_go_mod())
 
-def add_missing_database_files(database_files: List, database_type: str):
+def add_missing_database_files(database_files: Dict[str, FileData], database_type: str):
     """Add missing essential database files"""
-    existing_paths = [f["path"] for f in database_files]
-    
-    if database_type == "sqlite" and "database/schema.sql" not in existing_paths:
-        database_files.append({
-            "path": "database/schema.sql",
-            "content": create_sqlite_schema()
-        })
+    if database_type == "sqlite" and "database/schema.sql" not in database_files:
+        database_files["database/schema.sql"] = FileData("database/schema.sql", create_sqlite_schema())
     
-    if database_type == "postgresql" and "database/migrations" not in existing_paths:
-        database_files.append({
-            "path": "database/migrations/001_initial.sql",
-            "content": create_postgres_migration()
-        })
+    if database_type == "postgresql" and "database/migrations/001_initial.sql" not in database_files:
+        database_files["database/migrations/001_initial.sql"] = FileData("database/migrations/001_initial.sql", create_postgres_migration())
 
-def add_missing_deployment_files(deployment_files: List, frontend_framework: str, backend_framework: str):
+def add_missing_deployment_files(deployment_files: Dict[str, FileData], frontend_framework: str, backend_framework: str):
     """Add missing essential deployment files"""
-    existing_paths = [f["path"] for f in deployment_files]
+    if "Dockerfile" not in deployment_files:
+        deployment_files["Dockerfile"] = FileData("Dockerfile", create_dockerfile(frontend_framework, backend_framework))
     
-    if "Dockerfile" not in existing_paths:
-        deployment_files.append({
-            "path": "Dockerfile",
-            "content": create_dockerfile(frontend_framework, backend_framework)
-        })
+    if "docker-compose.yml" not in deployment_files:
+        deployment_files["docker-compose.yml"] = FileData("docker-compose.yml", create_docker_compose(frontend_framework, backend_framework))
     
-    if "docker-compose.yml" not in existing_paths:
-        deployment_files.append({
-            "path": "docker-compose.yml",
-            "content": create_docker_compose(frontend_framework, backend_framework)
-        })
-    
-    if frontend_framework in ["react", "nextjs", "vue"] and ".env.example" not in existing_paths:
-        deployment_files.append({
-            "path": ".env.example",
-            "content": create_env_example(frontend_framework, backend_framework)
-        })
+    if frontend_framework in ["react", "nextjs", "vue"] and ".env.example" not in deployment_files:
+        deployment_files[".env.example"] = FileData(".env.example", create_env_example(frontend_framework, backend_framework))
 
-def add_missing_documentation_files(documentation_files: List, frontend_framework: str, backend_framework: str, database_type: str):
+def add_missing_documentation_files(documentation_files: Dict[str, FileData], frontend_framework: str, backend_framework: str, database_type: str):
     """Add missing essential documentation files"""
-    existing_paths = [f["path"] for f in documentation_files]
-    
-    if "README.md" not in existing_paths:
-        documentation_files.append({
-            "path": "README.md",
-            "content": create_fullstack_readme(frontend_framework, backend_framework, database_type)
-        })
+    if "README.md" not in documentation_files:
+        documentation_files["README.md"] = FileData("README.md", create_fullstack_readme(frontend_framework, backend_framework, database_type))
     
-    if "API.md" not in existing_paths:
-        documentation_files.append({
-            "path": "API.md",
-            "content": create_api_documentation()
-        })
+    if "API.md" not in documentation_files:
+        documentation_files["API.md"] = FileData("API.md", create_api_documentation())
+
+# File creation functions. Plain literals are already shared constants; the
+# JSON manifests are serialized once here and the f-string templates are
+# cached per stack.
+_REACT_PACKAGE_JSON = orjson.dumps({
+    "name": "fullstack-app-frontend",
+    "version": "1.0.0",
+    "private": True,
+    "dependencies": {
+        "react": "^18.2.0",
+        "react-dom": "^18.2.0",
+        "react-router-dom": "^6.8.0",
+        "axios": "^1.3.0",
+        "react-query": "^3.39.0"
+    },
+    "scripts": {
+        "start": "react-scripts start",
+        "build": "react-scripts build",
+        "test": "react-scripts test",
+        "eject": "react-scripts eject"
+    },
+    "devDependencies": {
+        "react-scripts": "^5.0.1"
+    }
+}, option=orjson.OPT_INDENT_2).decode()
 
-# File creation functions
 def create_react_package_json() -> str:
-    return json.dumps({
-        "name": "fullstack-app-frontend",
-        "version": "1.0.0",
-        "private": True,
-        "dependencies": {
-            "react": "^18.2.0",
-            "react-dom": "^18.2.0",
-            "react-router-dom": "^6.8.0",
-            "axios": "^1.3.0",
-            "react-query": "^3.39.0"
-        },
-        "scripts": {
-            "start": "react-scripts start",
-            "build": "react-scripts build",
-            "test": "react-scripts test",
-            "eject": "react-scripts eject"
-        },
-        "devDependencies": {
-            "react-scripts": "^5.0.1"
-        }
-    }, indent=2)
+    return _REACT_PACKAGE_JSON
 
 def create_nextjs_config() -> str:
     return """/** @type {import('next').NextConfig} */
@@ -378,30 +346,32 @@ export default defineConfig({
   },
 })"""
 
+_NODEJS_PACKAGE_JSON = orjson.dumps({
+    "name": "fullstack-app-backend",
+    "version": "1.0.0",
+    "main": "server.js",
+    "scripts": {
+        "start": "node server.js",
+        "dev": "nodemon server.js",
+        "test": "jest"
+    },
+    "dependencies": {
+        "express": "^4.18.2",
+        "cors": "^2.8.5",
+        "helmet": "^7.0.0",
+        "dotenv": "^16.0.0",
+        "bcryptjs": "^2.4.3",
+        "jsonwebtoken": "^9.0.0",
+        "sqlite3": "^5.1.6"
+    },
+    "devDependencies": {
+        "nodemon": "^2.0.20",
+        "jest": "^29.0.0"
+    }
+}, option=orjson.OPT_INDENT_2).decode()
+
 def create_nodejs_package_json() -> str:
-    return json.dumps({
-        "name": "fullstack-app-backend",
-        "version": "1.0.0",
-        "main": "server.js",
-        "scripts": {
-            "start": "node server.js",
-            "dev": "nodemon server.js",
-            "test": "jest"
-        },
-        "dependencies": {
-            "express": "^4.18.2",
-            "cors": "^2.8.5",
-            "helmet": "^7.0.0",
-            "dotenv": "^16.0.0",
-            "bcryptjs": "^2.4.3",
-            "jsonwebtoken": "^9.0.0",
-            "sqlite3": "^5.1.6"
-        },
-        "devDependencies": {
-            "nodemon": "^2.0.20",
-            "jest": "^29.0.0"
-        }
-    }, indent=2)
+    return _NODEJS_PACKAGE_JSON
 
 def create_python_requirements() -> str:
     return """fastapi==0.95.2
@@ -478,6 +448,7 @@ CREATE TABLE posts (
 -- DROP TABLE posts;
 -- DROP TABLE users;"""
 
+@functools.lru_cache(maxsize=64)
 def create_dockerfile(frontend_framework: str, backend_framework: str) -> str:
     return f"""# Multi-stage build for full-stack application
 FROM node:18-alpine AS frontend-builder
@@ -562,6 +533,7 @@ CORS_ORIGIN=http://localhost:3000
 RATE_LIMIT_WINDOW=15
 RATE_LIMIT_MAX_REQUESTS=100"""
 
+@functools.lru_cache(maxsize=64)
 def create_fullstack_readme(frontend_framework: str, backend_framework: str, database_type: str) -> str:
     return f"""# Full-Stack Web Application
 
@@ -821,6 +793,7 @@ All API endpoints return consistent error responses:
 API requests are limited to 100 requests per 15-minute window per IP address.
 """
 
+@functools.lru_cache(maxsize=64)
 def generate_setup_instructions(frontend_framework: str, backend_framework: str, database_type: str) -> str:
     """Generate comprehensive setup instructions"""
     return f"""
@@ -894,6 +867,7 @@ go run main.go
 - Database: Check connection in backend logs
 """
 
+@functools.lru_cache(maxsize=64)
 def generate_deployment_guide(frontend_framework: str, backend_framework: str, database_type: str) -> str:
     """Generate comprehensive deployment guide"""
     return f"""
@@ -1,30 +1,44 @@
-from fastapi import FastAPI, Request, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi import FastAPI, Request, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi.responses import ORJSONResponse, FileResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.encoders import jsonable_encoder
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 import os, uuid, subprocess
-import json
+import re
+import codecs
+import orjson
 import sys
 import shutil
 from typing import Optional
 import asyncio
+import functools
+import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pydantic import BaseModel
-import httpx
-from typing import Optional, Dict, List
-from datetime import datetime, timedelta
-from utils.file_utils import save_project_files, zip_project_files
+from typing import Optional, Dict, List, NamedTuple
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from utils.file_utils import save_project_files, stream_project_zip
 from utils.github_utils import push_to_github
 from utils.project_fixer import fix_project
-from agents_core.builder_agent import generate_code_with_agent
-from agents_core.fullstack_agent import generate_fullstack_project
-from agents_core.chat_agent import generate_chat_response, generate_image_response, analyze_message_intent
+from utils.logging_utils import setup_queue_logging
+from utils.ttl_cache import TTLCache
+from agents import close_shared_clients
+from agents_core.builder_agent import generate_code_with_agent, initialize_gemini as init_builder_model
+from agents_core.fullstack_agent import generate_fullstack_project, initialize_gemini as init_fullstack_model
+from agents_core.chat_agent import initialize_gemini as init_chat_model, generate_chat_response, stream_chat_response, generate_image_response, analyze_message_intent
 import firebase_admin
 from firebase_admin import credentials, firestore
-from firebase_admin.firestore import SERVER_TIMESTAMP
+from firebase_admin.firestore import SERVER_TIMESTAMP, Increment
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition
 
+logger = logging.getLogger(__name__)
 
 # Load environment variables from .env (for local dev)
 load_dotenv()
@@ -32,46 +46,71 @@ load_dotenv()
 # Firebase credentials from environment variable (for Vercel/Railway)
 import base64
 
-firebase_creds_env = os.getenv("FIREBASE_SERVICE_ACCOUNT")
-firebase_project_id = os.getenv("FIREBASE_PROJECT_ID")
+def _load_firebase_credentials() -> dict:
+    firebase_creds_env = os.getenv("FIREBASE_SERVICE_ACCOUNT")
+    if not firebase_creds_env:
+        raise Exception('FIREBASE_SERVICE_ACCOUNT env variable not set')
+    # Try to parse as JSON, or decode if base64
+    try:
+        # If it's a base64 string, decode it
+        if firebase_creds_env.strip().startswith('{'):
+            return orjson.loads(firebase_creds_env)
+        creds_json = base64.b64decode(firebase_creds_env).decode('utf-8')
+        return orjson.loads(creds_json)
+    except Exception as e:
+        raise Exception(f"Failed to parse FIREBASE_SERVICE_ACCOUNT env variable: {e}")
 
-try:
-    if firebase_creds_env:
-        # Try to parse as JSON, or decode if base64
-        try:
-            # If it's a base64 string, decode it
-            if firebase_creds_env.strip().startswith('{'):
-                creds_dict = json.loads(firebase_creds_env)
-            else:
-                creds_json = base64.b64decode(firebase_creds_env).decode('utf-8')
-                creds_dict = json.loads(creds_json)
-            cred = credentials.Certificate(creds_dict)
-        except Exception as e:
-            raise Exception(f"Failed to parse FIREBASE_SERVICE_ACCOUNT env variable: {e}")
+@functools.lru_cache(maxsize=1)
+def get_db():
+    """Initialize Firebase on first use and return the shared Firestore client"""
+    try:
+        cred = credentials.Certificate(_load_firebase_credentials())
         firebase_admin.initialize_app(cred, {
-            'databaseURL': f'https://{firebase_project_id}.firebaseio.com'
+            'databaseURL': f'https://{os.getenv("FIREBASE_PROJECT_ID")}.firebaseio.com'
         })
-        db = firestore.client()
-    else:
-        raise Exception('FIREBASE_SERVICE_ACCOUNT env variable not set')
-except Exception as e:
-    print(f"Error initializing Firebase: {str(e)}")
-    raise
+        return firestore.client()
+    except Exception as e:
+        logger.error("Error initializing Firebase: %s", e)
+        raise
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log records are formatted and written on a background thread; LOG_LEVEL=DEBUG
+    # turns on the per-request limit details
+    log_listener = setup_queue_logging(logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper()))
+    # Configure Gemini and build the models before the first request so no
+    # user pays for the SDK import and channel setup
+    try:
+        await asyncio.to_thread(init_chat_model)
+        await asyncio.to_thread(init_builder_model)
+        await asyncio.to_thread(init_fullstack_model)
+    except Exception as e:
+        logger.warning("Gemini warmup failed: %s", e)
+    # Same for Firestore: credentials and the client (whose gRPC channel the SDK
+    # already keeps alive with 30s pings) are built once, here
+    try:
+        await asyncio.to_thread(get_db)
+    except Exception as e:
+        logger.warning("Firestore warmup failed: %s", e)
+    yield
+    await close_shared_clients()
+    log_listener.stop()
 
-app = FastAPI()
 
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
-# Configure CORS
-origins = [
-    "https://a-nother.vercel.app",
-    "http://127.0.0.1:3000",  
-    "http://localhost:8000",
-    "https://sandpack.codesandbox.io",
-    "https://*.netlify.app"  
-]
+
+# Configure CORS. One regex, compiled once by Starlette; every entry is an
+# exact host. No wildcard hosting domains (*.netlify.app, *.vercel.app): with
+# credentials allowed, any site deployed there could call the API as the user
+ALLOWED_ORIGIN_REGEX = (
+    r"https://a-nother\.vercel\.app"
+    r"|http://127\.0\.0\.1:3000"
+    r"|http://localhost:8000"
+    r"|https://sandpack\.codesandbox\.io"
+)
 
 # origins = [
 #     # Production
@@ -86,7 +125,7 @@ origins = [
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
+    allow_origin_regex=ALLOWED_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -94,14 +133,152 @@ app.add_middleware(
 
 PROJECTS_DIR = "projects"
 os.makedirs(PROJECTS_DIR, exist_ok=True)
+# Built download archives, one per project tree fingerprint
+ZIP_CACHE_DIR = "zip_cache"
+
+# Framework classification used to shape /generate responses
+FRONTEND_FRAMEWORKS = frozenset({"react", "nextjs", "vue", "angular", "html", "svelte", "nuxt", "gatsby"})
+BACKEND_ONLY_FRAMEWORKS = frozenset({
+    "nodejs-express", "nodejs-nestjs", "python-django", "python-flask", "python-fastapi",
+    "php-laravel", "php-codeigniter", "ruby-rails", "ruby-sinatra", "java-spring",
+    "csharp-dotnet", "go-gin", "go-echo", "rust-actix", "rust-rocket",
+})
+BACKEND_LANGUAGES = frozenset({"python", "nodejs", "php", "go", "java"})
+# framework -> (is_frontend, is_backend_only), one lookup per response
+FRAMEWORK_TRAITS = {
+    **{name: (False, True) for name in BACKEND_ONLY_FRAMEWORKS | BACKEND_LANGUAGES},
+    **{name: (True, False) for name in FRONTEND_FRAMEWORKS},
+}
+NO_FRAMEWORK_TRAITS = (False, False)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _generation_response(files: list, project_id: str, language: str, *, is_frontend: bool,
+                         is_backend_only: bool = False, is_fullstack: bool = False,
+                         stream: bool = False, **extra):
+    """Success response for a generation result, or NDJSON when the client asked for it.
+
+    The NDJSON form is a line with every field except "files", then one line
+    per file, so large projects are serialized and sent file by file.
+    """
+    meta = {
+        "success": True,
+        "projectId": project_id,
+        "language": language,
+        "isFrontend": is_frontend,
+        "isBackendOnly": is_backend_only,
+        "isFullstack": is_fullstack,
+        **extra
+    }
+    if not stream:
+        return ORJSONResponse(status_code=200, content={**meta, "files": files})
+    
+    def lines():
+        yield orjson.dumps(meta) + b"\n"
+        for file in files:
+            yield orjson.dumps(file) + b"\n"
+    
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+# Generated files are written after the response is sent, so the project
+# document records how that went; the file routes check it before touching disk
+FILES_PENDING, FILES_READY, FILES_FAILED = "pending", "ready", "failed"
+
+def _save_files_in_background(project_id: str, files: List[Dict[str, str]], fix: bool = False):
+    """Background task: write the generated files (fixing common issues if asked) and record filesStatus"""
+    project_dir = os.path.join(PROJECTS_DIR, project_id)
+    try:
+        save_project_files(project_id, files, PROJECTS_DIR)
+        logger.info("Saved project files to: %s", project_dir)
+        update = {"filesStatus": FILES_READY}
+    except Exception as e:
+        logger.error("Error saving project %s in background: %s", project_id, e)
+        update = {"filesStatus": FILES_FAILED, "filesError": str(e)}
+
+    if fix and update["filesStatus"] == FILES_READY:
+        # A failed fix leaves the saved files usable, so it doesn't fail the save
+        try:
+            fix_result = fix_project(project_dir)
+            logger.info("Project fixes applied: %s", fix_result)
+            if fix_result.get("fixes"):
+                update["fixesApplied"] = fix_result["fixes"]
+        except Exception as e:
+            logger.error("Error fixing project %s in background: %s", project_id, e)
+
+    try:
+        get_db().collection('projects').document(project_id).update(update)
+    except Exception as e:
+        logger.error("Error recording files status for project %s: %s", project_id, e)
+    _update_cached_project(project_id, update)
+
+def _check_files_status(project_data: Optional[dict]):
+    """Raise if the project's files are still being written or failed to save"""
+    status = project_data.get('filesStatus') if project_data else None
+    if status == FILES_PENDING:
+        raise HTTPException(
+            status_code=409,
+            detail="Project files are still being saved, try again shortly",
+            headers={"Retry-After": "2"}
+        )
+    if status == FILES_FAILED:
+        raise HTTPException(status_code=500, detail="Saving this project's files failed; please regenerate it")
+
+async def _require_saved_files(project_id: str):
+    _check_files_status(await get_cached_project(project_id))
+
+# Files decoded as text when loading a project; anything else (images, fonts,
+# archives) is passed through base64-encoded. "" covers Dockerfile, .env, etc.
+_TEXT_EXTENSIONS = frozenset({
+    "", ".txt", ".md", ".html", ".htm", ".css", ".scss", ".sass", ".less",
+    ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".vue", ".svelte", ".astro",
+    ".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".conf", ".env", ".xml", ".svg",
+    ".py", ".go", ".mod", ".sum", ".java", ".kt", ".php", ".rb", ".rs", ".cs", ".csproj",
+    ".sql", ".prisma", ".graphql", ".sh", ".bat", ".gradle", ".properties", ".lock",
+})
+
+def _read_project_file(path: Path) -> Optional[Dict[str, str]]:
+    try:
+        data = path.read_bytes()
+    except Exception as e:
+        logger.error("Error reading file %s: %s", path, e)
+        return None
+    if path.suffix.lower() in _TEXT_EXTENSIONS:
+        return {"content": data.decode('utf-8', errors='replace')}
+    return {"content": base64.b64encode(data).decode('ascii'), "encoding": "base64"}
+
+# Dependency and build output directories that show up after a project is
+# installed or built; they're never part of the generated source
+_SKIPPED_PROJECT_DIRS = frozenset({"node_modules", ".next", ".git", "__pycache__"})
+
+def _list_project_paths(project_dir: str) -> List[str]:
+    """Relative paths of every source file under project_dir, without reading them"""
+    paths = []
+    for root, dirnames, filenames in os.walk(project_dir):
+        dirnames[:] = [d for d in dirnames if d not in _SKIPPED_PROJECT_DIRS]
+        paths.extend(os.path.relpath(os.path.join(root, filename), project_dir) for filename in filenames)
+    return paths
+
+def _load_project_files(project_dir: str, paths: List[str]) -> List[Dict[str, str]]:
+    """Read the given project files; blocking, so call it via asyncio.to_thread"""
+    root = Path(project_dir)
+    with ThreadPoolExecutor(max_workers=min(16, len(paths) or 1)) as executor:
+        entries = executor.map(_read_project_file, (root / path for path in paths))
+        # Skip files that can't be read
+        return [
+            {"path": path, **entry}
+            for path, entry in zip(paths, entries)
+            if entry is not None
+        ]
 
 # Request Models
 class GenerateSiteRequest(BaseModel):
-    prompt: str
-    theme: str
-    framework: str
-    userId: str
-    email: str
+    # prompt and userId are validated in the route so a missing one keeps its 400 response
+    prompt: Optional[str] = None
+    theme: str = "default"
+    framework: Optional[str] = None
+    userId: Optional[str] = None
+    email: Optional[str] = None
+    projectId: Optional[str] = None  # Set when editing an existing project
     projectType: Optional[str] = "frontend"  # "frontend", "backend", or "fullstack"
     frontendFramework: Optional[str] = None
     backendFramework: Optional[str] = None
@@ -138,131 +315,125 @@ def home():
 
  
 
+MAX_GENERATIONS_PER_USER = 2
+# Entries disappear once no request holds or waits on the semaphore
+_USER_SEMAPHORES = weakref.WeakValueDictionary()
+
+@asynccontextmanager
+async def _user_generation_slot(user_id: str):
+    semaphore = _USER_SEMAPHORES.get(user_id)
+    if semaphore is None:
+        semaphore = _USER_SEMAPHORES[user_id] = asyncio.Semaphore(MAX_GENERATIONS_PER_USER)
+    async with semaphore:
+        yield
+
+async def _generation_limit_response(user_id: str, email: str) -> Optional[ORJSONResponse]:
+    """Check the user's generation limit; returns the 429 response when it's reached"""
+    try:
+        limit = await check_generation_limit(user_id, email)
+        logger.debug("Generation limit check result for user %s: %s", user_id, limit.can_generate)
+    except Exception as e:
+        logger.error("Error in check_generation_limit for user %s: %s", user_id, e)
+        # Fallback: allow generation if we can't check the limit
+        limit = GenerationLimit(can_generate=True)
+        logger.warning("Fallback: allowing generation due to error")
+
+    if not limit.can_generate:
+        # The limit check already read the user's plan and counts; no second fetch
+        max_count = limit.max_count
+        current_count = limit.current_count
+        remaining = max_count - current_count
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("User %s generation limit details:", user_id)
+            logger.debug("  - Plan: %s", limit.plan)
+            logger.debug("  - maxDailyGenerations: %s", max_count)
+            logger.debug("  - dailyGenerations: %s", current_count)
+            logger.debug("  - remaining: %s", remaining)
+            logger.debug("  - firstGenerationDate: %s", limit.first_generation_date)
+            logger.debug("  - lastGenerationDate: %s", limit.last_generation_date)
+
+        error_msg = f"You have reached your daily generation limit ({current_count}/{max_count})"
+
+        if limit.plan == 'free':
+            error_msg += ". Upgrade to Pro for 20 generations per day."
+
+        return ORJSONResponse(
+            status_code=429,
+            content={"error": error_msg}
+        )
+    return None
+
 # main.py - Update the generate endpoint
 @app.post("/generate")
-async def generate_website(request: Request):
+async def generate_website(req: GenerateSiteRequest, request: Request, background_tasks: BackgroundTasks):
     try:
-        data = await request.json()
-        prompt = data.get("prompt")
-        framework = data.get("framework")
-        theme = data.get("theme", "default")
-        user_id = data.get("userId")
-        email = data.get("email")
-        project_id = data.get("projectId")  # New field for editing existing projects
-        project_type = data.get("projectType", "frontend")
-        frontend_framework = data.get("frontendFramework")
-        backend_framework = data.get("backendFramework")
-        database_type = data.get("databaseType", "sqlite")
+        stream = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+        prompt = req.prompt
+        framework = req.framework
+        theme = req.theme
+        user_id = req.userId
+        email = req.email
+        project_id = req.projectId  # New field for editing existing projects
+        project_type = req.projectType
+        frontend_framework = req.frontendFramework
+        backend_framework = req.backendFramework
+        database_type = req.databaseType
         
         if not prompt:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={"error": "Prompt is required"}
             )
         
         if not user_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={"error": "User ID is required"}
             )
         
-        # Check generation limit with transaction
-        try:
-            can_generate = await check_generation_limit(user_id, email)
-            print(f"Generation limit check result for user {user_id}: {can_generate}")
-        except Exception as e:
-            print(f"Error in check_generation_limit for user {user_id}: {str(e)}")
-            # Fallback: allow generation if we can't check the limit
-            can_generate = True
-            print(f"Fallback: allowing generation due to error")
-        
-        if not can_generate:
-            # Get user's current plan and remaining generations for error message
-            user_ref = db.collection('users').document(user_id)
-            user_doc = user_ref.get()
-            user_data = user_doc.to_dict()
-            
-            max_count = user_data.get('maxDailyGenerations', 3)
-            current_count = user_data.get('dailyGenerations', 0)
-            remaining = max_count - current_count
-            
-            print(f"User {user_id} generation limit details:")
-            print(f"  - Plan: {user_data.get('plan')}")
-            print(f"  - maxDailyGenerations: {max_count}")
-            print(f"  - dailyGenerations: {current_count}")
-            print(f"  - remaining: {remaining}")
-            print(f"  - firstGenerationDate: {user_data.get('firstGenerationDate')}")
-            print(f"  - lastGenerationDate: {user_data.get('lastGenerationDate')}")
-            
-            error_msg = f"You have reached your daily generation limit ({current_count}/{max_count})"
-            
-            if user_data.get('plan') == 'free':
-                error_msg += ". Upgrade to Pro for 20 generations per day."
-                
-            return JSONResponse(
-                status_code=429,
-                content={"error": error_msg}
-            )
-        
-        # If project_id is provided, we're editing an existing project
-        if project_id:
-            # Verify the project exists and belongs to the user
-            project_ref = db.collection('projects').document(project_id)
-            project_doc = project_ref.get()
+        # At most a couple of generations per user run at once, so a burst of
+        # requests doesn't pile retries onto the same user document
+        async with _user_generation_slot(user_id):
+            limit_response = await _generation_limit_response(user_id, email)
+            if limit_response is not None:
+                return limit_response
+        
+            # If project_id is provided, we're editing an existing project
+            if project_id:
+                # Verify the project exists and belongs to the user
+                project_ref = get_db().collection('projects').document(project_id)
+                project_data = await get_cached_project(project_id)
             
-            if not project_doc.exists:
-                return JSONResponse(
-                    status_code=404,
-                    content={"error": "Project not found"}
-                )
+                if project_data is None:
+                    return ORJSONResponse(
+                        status_code=404,
+                        content={"error": "Project not found"}
+                    )
             
-            project_data = project_doc.to_dict()
-            if project_data.get('userId') != user_id:
-                return JSONResponse(
-                    status_code=403,
-                    content={"error": "You don't have permission to edit this project"}
-                )
+                if project_data.get('userId') != user_id:
+                    return ORJSONResponse(
+                        status_code=403,
+                        content={"error": "You don't have permission to edit this project"}
+                    )
             
-            # Load existing project files
-            project_dir = os.path.join(PROJECTS_DIR, project_id)
-            if not os.path.exists(project_dir):
-                return JSONResponse(
-                    status_code=404,
-                    content={"error": "Project files not found"}
-                )
+                # Load existing project files
+                project_dir = os.path.join(PROJECTS_DIR, project_id)
+                if not os.path.exists(project_dir):
+                    return ORJSONResponse(
+                        status_code=404,
+                        content={"error": "Project files not found"}
+                    )
             
-            # Get existing files
-            existing_files = []
-            for root, _, filenames in os.walk(project_dir):
-                for filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        existing_files.append({
-                            "path": os.path.relpath(file_path, project_dir),
-                            "content": content
-                        })
-                    except UnicodeDecodeError:
-                        # Try with different encoding if UTF-8 fails
-                        try:
-                            with open(file_path, 'r', encoding='latin-1') as f:
-                                content = f.read()
-                            existing_files.append({
-                                "path": os.path.relpath(file_path, project_dir),
-                                "content": content
-                            })
-                        except Exception as e:
-                            print(f"Error reading file {file_path}: {str(e)}")
-                            # Skip files that can't be read
-                            continue
+                # Only the paths go into the prompt; file bodies are read after generation
+                existing_paths = await asyncio.to_thread(_list_project_paths, project_dir)
             
-            # Generate new content based on existing project context
-            existing_prompt = project_data.get('prompt', '')
-            enhanced_prompt = f"""Based on this existing project description: "{existing_prompt}"
+                # Generate new content based on existing project context
+                existing_prompt = project_data.get('prompt', '')
+                enhanced_prompt = f"""Based on this existing project description: "{existing_prompt}"
 
 The project currently has these files:
-{chr(10).join([f"- {f['path']}" for f in existing_files[:10]])}
+{chr(10).join([f"- {path}" for path in existing_paths[:10]])}
 
 Please add or modify the following: {prompt}
 
@@ -275,199 +446,168 @@ Important instructions:
 
 Please generate the complete updated files."""
             
-            result = await generate_code_with_agent(
-                prompt=enhanced_prompt,
-                framework=framework,
-                theme=theme
-            )
-            
-            # Merge new files with existing files
-            new_files = []
-            for file_info in result.files:
-                new_files.append({
-                    "path": file_info.path,
-                    "content": file_info.content
-                })
-            
-            # Combine existing and new files, with new files taking precedence
-            all_files = existing_files.copy()
-            for new_file in new_files:
-                # Check if file already exists
-                existing_file_index = next(
-                    (i for i, f in enumerate(all_files) if f["path"] == new_file["path"]), 
-                    None
+                result = await generate_code_with_agent(
+                    prompt=enhanced_prompt,
+                    framework=framework,
+                    theme=theme
                 )
-                if existing_file_index is not None:
-                    # Update existing file
-                    all_files[existing_file_index] = new_file
-                else:
-                    # Add new file
-                    all_files.append(new_file)
-            
-            # Save updated files
-            save_project_files(project_id, all_files, PROJECTS_DIR)
             
-            # Update project in Firestore
-            project_ref.update({
-                "prompt": f"{project_data.get('prompt', '')}\n\nAdditional: {prompt}",
-                "framework": framework,
-                "updatedAt": SERVER_TIMESTAMP,
-                "files": all_files
-            })
+                new_files = {
+                    file_info.path: {"path": file_info.path, "content": file_info.content}
+                    for file_info in result.files
+                }
+                # Existing files the agent rewrote don't need to be read at all
+                existing_files = await asyncio.to_thread(
+                    _load_project_files, project_dir, [path for path in existing_paths if path not in new_files]
+                )
             
-            await increment_generation_count(user_id)
+                # Combine existing and new files, with new files taking precedence.
+                # Keyed by path so each upsert is O(1); existing files keep their
+                # position and new ones are appended
+                files_by_path = dict.fromkeys(existing_paths)
+                files_by_path.update((f["path"], f) for f in existing_files)
+                files_by_path.update(new_files)
+                all_files = [f for f in files_by_path.values() if f is not None]
             
-            is_frontend = framework in ["react", "nextjs", "vue", "angular", "html", "svelte"]
+                # Save updated files
+                background_tasks.add_task(_save_files_in_background, project_id, all_files)
             
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "success": True,
-                    "files": all_files,
-                    "projectId": project_id,
-                    "language": framework,
-                    "isFrontend": is_frontend,
-                    "isBackendOnly": framework in ["python", "nodejs", "php", "go", "java"],
-                    "isEdit": True
+                # Update project in Firestore
+                project_update = {
+                    "prompt": f"{project_data.get('prompt', '')}\n\nAdditional: {prompt}",
+                    "framework": framework,
+                    "updatedAt": SERVER_TIMESTAMP,
+                    "filesStatus": FILES_PENDING,
+                    "files": all_files
                 }
-            )
-        
-        # Handle full-stack project generation
-        if project_type == "fullstack" and frontend_framework and backend_framework:
-            print(f"Generating full-stack project: {frontend_framework} + {backend_framework} + {database_type}")
-            
-            result = await generate_fullstack_project(
-                prompt=prompt,
-                frontend_framework=frontend_framework,
-                backend_framework=backend_framework,
-                database_type=database_type
-            )
+                await save_project_and_count(user_id, project_ref, project_update, update=True)
+                _update_cached_project(project_id, project_update)
             
-            if not result.success:
-                return JSONResponse(
-                    status_code=500,
-                    content={"error": "Failed to generate full-stack project"}
+                is_frontend, is_backend_only = FRAMEWORK_TRAITS.get(framework, NO_FRAMEWORK_TRAITS)
+                return _generation_response(
+                    all_files, project_id, framework,
+                    is_frontend=is_frontend,
+                    is_backend_only=is_backend_only,
+                    isEdit=True,
+                    stream=stream
                 )
+        
+            # Handle full-stack project generation
+            if project_type == "fullstack" and frontend_framework and backend_framework:
+                logger.info("Generating full-stack project: %s + %s + %s", frontend_framework, backend_framework, database_type)
             
-            # Combine all files from different categories
-            all_files = []
-            all_files.extend(result.project.frontend_files)
-            all_files.extend(result.project.backend_files)
-            all_files.extend(result.project.database_files)
-            all_files.extend(result.project.deployment_files)
-            all_files.extend(result.project.documentation_files)
+                result = await generate_fullstack_project(
+                    prompt=prompt,
+                    frontend_framework=frontend_framework,
+                    backend_framework=backend_framework,
+                    database_type=database_type,
+                    similarity_text=prompt
+                )
             
-            # Create project ID and save files
-            project_id = str(uuid.uuid4())
-            save_project_files(project_id, all_files, PROJECTS_DIR)
+                if not result.success:
+                    # result.error is only set when the request itself needs
+                    # changing, e.g. a project too large for one response
+                    return ORJSONResponse(
+                        status_code=422 if result.error else 500,
+                        content={"error": result.error or "Failed to generate full-stack project"}
+                    )
             
-            # Save project to Firestore
-            project_ref = db.collection('projects').document(project_id)
-            project_ref.set({
-                "id": project_id,
-                "name": f"Full-Stack Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                "prompt": prompt,
-                "framework": f"{frontend_framework}+{backend_framework}",
-                "projectType": "fullstack",
-                "frontendFramework": frontend_framework,
-                "backendFramework": backend_framework,
-                "databaseType": database_type,
-                "theme": theme,
-                "userId": user_id,
-                "createdAt": SERVER_TIMESTAMP,
-                "updatedAt": SERVER_TIMESTAMP,
-                "files": all_files,
-                "setupInstructions": result.setup_instructions,
-                "deploymentGuide": result.deployment_guide
-            })
+                # Combine all files from different categories
+                all_files = [
+                    file_info._asdict()
+                    for files in (
+                        result.project.frontend_files,
+                        result.project.backend_files,
+                        result.project.database_files,
+                        result.project.deployment_files,
+                        result.project.documentation_files,
+                    )
+                    for file_info in files
+                ]
             
-            await increment_generation_count(user_id)
+                # Create project ID and save files
+                project_id = str(uuid.uuid4())
+                background_tasks.add_task(_save_files_in_background, project_id, all_files)
             
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "success": True,
+                # Save project to Firestore
+                project_ref = get_db().collection('projects').document(project_id)
+                await save_project_and_count(user_id, project_ref, {
+                    "id": project_id,
+                    "name": f"Full-Stack Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                    "prompt": prompt,
+                    "framework": f"{frontend_framework}+{backend_framework}",
+                    "projectType": "fullstack",
+                    "frontendFramework": frontend_framework,
+                    "backendFramework": backend_framework,
+                    "databaseType": database_type,
+                    "theme": theme,
+                    "userId": user_id,
+                    "createdAt": SERVER_TIMESTAMP,
+                    "updatedAt": SERVER_TIMESTAMP,
+                    "filesStatus": FILES_PENDING,
                     "files": all_files,
-                    "projectId": project_id,
-                    "language": f"{frontend_framework}+{backend_framework}",
-                    "isFrontend": True,
-                    "isBackendOnly": False,
-                    "isFullstack": True,
                     "setupInstructions": result.setup_instructions,
                     "deploymentGuide": result.deployment_guide
-                }
-            )
+                })
+            
+                return _generation_response(
+                    all_files, project_id, f"{frontend_framework}+{backend_framework}",
+                    is_frontend=True,
+                    is_fullstack=True,
+                    setupInstructions=result.setup_instructions,
+                    deploymentGuide=result.deployment_guide,
+                    stream=stream
+                )
         
-        # Logic for creating frontend/backend projects
-        print(f"Generating {project_type} project with framework: {framework}")
-        result = await generate_code_with_agent(
-            prompt=prompt,
-            framework=framework,
-            theme=theme
-        )
+            # Logic for creating frontend/backend projects
+            logger.info("Generating %s project with framework: %s", project_type, framework)
+            result = await generate_code_with_agent(
+                prompt=prompt,
+                framework=framework,
+                theme=theme,
+                similarity_text=prompt
+            )
         
         
-        project_id = str(uuid.uuid4())
-        files = []
+            project_id = str(uuid.uuid4())
+            files = [
+                {"path": file_info.path, "content": file_info.content}
+                for file_info in result.files
+            ]
         
-        for file_info in result.files:
-            files.append({
-                "path": file_info.path,
-                "content": file_info.content
+            # Writing and fixing the files on disk runs after the response is sent
+            background_tasks.add_task(_save_files_in_background, project_id, files, fix=True)
+
+            # Save project to Firestore
+            project_ref = get_db().collection('projects').document(project_id)
+            await save_project_and_count(user_id, project_ref, {
+                "id": project_id,
+                "name": f"Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                "prompt": prompt,
+                "framework": framework,
+                "theme": theme,
+                "projectType": "single",
+                "userId": user_id,
+                "createdAt": SERVER_TIMESTAMP,
+                "updatedAt": SERVER_TIMESTAMP,
+                "filesStatus": FILES_PENDING,
+                "files": files,
+                "fixesApplied": []
             })
         
-        save_project_files(project_id, files, PROJECTS_DIR)
-        project_dir = os.path.join(PROJECTS_DIR, project_id)
-        if not os.path.exists(project_dir):
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to save project files"
+            # Determine project characteristics based on project type and framework
+            is_frontend, is_backend_only = FRAMEWORK_TRAITS.get(framework, NO_FRAMEWORK_TRAITS)
+            return _generation_response(
+                files, project_id, framework,
+                is_frontend=project_type == "frontend" or is_frontend,
+                is_backend_only=project_type == "backend" or is_backend_only,
+                is_fullstack=project_type == "fullstack",
+                projectType=project_type,
+                stream=stream
             )
-        print(f"Saved project files to: {project_dir}")
-        print(f"Files saved: {os.listdir(project_dir)}")
-
-        # Fix common project issues
-        fix_result = fix_project(project_dir)
-        print(f"Project fixes applied: {fix_result}")
-
-        # Save project to Firestore
-        project_ref = db.collection('projects').document(project_id)
-        project_ref.set({
-            "id": project_id,
-            "name": f"Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            "prompt": prompt,
-            "framework": framework,
-            "theme": theme,
-            "projectType": "single",
-            "userId": user_id,
-            "createdAt": SERVER_TIMESTAMP,
-            "updatedAt": SERVER_TIMESTAMP,
-            "files": files,
-            "fixesApplied": fix_result.get("fixes", [])
-        })
-        
-        await increment_generation_count(user_id)
-        
-        # Determine project characteristics based on project type and framework
-        is_frontend = project_type == "frontend" or framework in ["react", "nextjs", "vue", "angular", "html", "svelte", "nuxt", "gatsby"]
-        is_backend_only = project_type == "backend" or framework in ["nodejs-express", "nodejs-nestjs", "python-django", "python-flask", "python-fastapi", "php-laravel", "php-codeigniter", "ruby-rails", "ruby-sinatra", "java-spring", "csharp-dotnet", "go-gin", "go-echo", "rust-actix", "rust-rocket"]
-
-        return JSONResponse(
-            status_code=200,
-            content={
-                "success": True,
-                "files": files,
-                "projectId": project_id,
-                "language": framework,
-                "projectType": project_type,
-                "isFrontend": is_frontend,
-                "isBackendOnly": is_backend_only,
-                "isFullstack": project_type == "fullstack"
-            }
-        )
         
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": str(e)}
         )
@@ -475,6 +615,7 @@ Please generate the complete updated files."""
 
 @app.post("/generate-with-image")
 async def generate_website_with_image(
+    background_tasks: BackgroundTasks,
     prompt: str = Form(...),
     framework: str = Form(...),
     userId: str = Form(...),
@@ -490,11 +631,19 @@ async def generate_website_with_image(
     Generate website with image analysis
     """
     try:
-        # Read and encode image
-        image_data = await image.read()
-
-        # Enhance prompt with image analysis
-        enhanced_prompt = f"""
+        # Same per-user bound as /generate
+        async with _user_generation_slot(userId):
+            # Same daily limit as /generate; this also resets an expired 24h
+            # window before save_project_and_count increments the count
+            limit_response = await _generation_limit_response(userId, email)
+            if limit_response is not None:
+                return limit_response
+
+            # The generation agents take text only, so the upload is never read
+            # into memory; the prompt just tells the model an image was provided
+
+            # Enhance prompt with image analysis
+            enhanced_prompt = f"""
         {prompt}
 
         IMPORTANT: An image has been provided for analysis. Please analyze the uploaded image and:
@@ -507,116 +656,112 @@ async def generate_website_with_image(
         Create a website that reflects or incorporates elements from the provided image.
         """
 
-        # Use the enhanced prompt for generation
-        if projectType == "fullstack":
-            result = await generate_fullstack_project(
-                prompt=enhanced_prompt,
-                frontend_framework=frontendFramework or "react",
-                backend_framework=backendFramework or "nodejs",
-                database_type=databaseType
-            )
+            # Use the enhanced prompt for generation
+            if projectType == "fullstack":
+                result = await generate_fullstack_project(
+                    prompt=enhanced_prompt,
+                    frontend_framework=frontendFramework or "react",
+                    backend_framework=backendFramework or "nodejs",
+                    database_type=databaseType
+                )
 
-            # Process fullstack result
-            all_files = []
-            for file_info in result.project.frontend_files:
-                all_files.append({
-                    "path": file_info["path"],
-                    "content": file_info["content"]
-                })
-            for file_info in result.project.backend_files:
-                all_files.append({
-                    "path": file_info["path"],
-                    "content": file_info["content"]
-                })
-            for file_info in result.project.database_files:
-                all_files.append({
-                    "path": file_info["path"],
-                    "content": file_info["content"]
-                })
+                if not result.success:
+                    return ORJSONResponse(
+                        status_code=422 if result.error else 500,
+                        content={"error": result.error or "Failed to generate full-stack project"}
+                    )
+
+                # Process fullstack result
+                all_files = []
+                for file_info in result.project.frontend_files:
+                    all_files.append({
+                        "path": file_info.path,
+                        "content": file_info.content
+                    })
+                for file_info in result.project.backend_files:
+                    all_files.append({
+                        "path": file_info.path,
+                        "content": file_info.content
+                    })
+                for file_info in result.project.database_files:
+                    all_files.append({
+                        "path": file_info.path,
+                        "content": file_info.content
+                    })
 
-            project_id = str(uuid.uuid4())
-            save_project_files(project_id, all_files, PROJECTS_DIR)
+                project_id = str(uuid.uuid4())
+                background_tasks.add_task(_save_files_in_background, project_id, all_files)
+
+                # Save to Firestore
+                project_ref = get_db().collection('projects').document(project_id)
+                await save_project_and_count(userId, project_ref, {
+                    "id": project_id,
+                    "name": f"Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                    "prompt": enhanced_prompt,
+                    "framework": f"{frontendFramework}+{backendFramework}",
+                    "theme": theme,
+                    "projectType": "fullstack",
+                    "userId": userId,
+                    "createdAt": SERVER_TIMESTAMP,
+                    "updatedAt": SERVER_TIMESTAMP,
+                    "filesStatus": FILES_PENDING,
+                    "files": all_files,
+                    "hasImage": True
+                })
 
-            # Save to Firestore
-            project_ref = db.collection('projects').document(project_id)
-            project_ref.set({
-                "id": project_id,
-                "name": f"Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                "prompt": enhanced_prompt,
-                "framework": f"{frontendFramework}+{backendFramework}",
-                "theme": theme,
-                "projectType": "fullstack",
-                "userId": userId,
-                "createdAt": SERVER_TIMESTAMP,
-                "updatedAt": SERVER_TIMESTAMP,
-                "files": all_files,
-                "hasImage": True
-            })
+                return _generation_response(
+                    all_files, project_id, f"{frontendFramework}+{backendFramework}",
+                    is_frontend=True,
+                    is_fullstack=True,
+                    setupInstructions=result.setup_instructions,
+                    deploymentGuide=result.deployment_guide
+                )
 
-            await increment_generation_count(userId)
-
-            return JSONResponse({
-                "success": True,
-                "files": all_files,
-                "projectId": project_id,
-                "language": f"{frontendFramework}+{backendFramework}",
-                "isFrontend": True,
-                "isBackendOnly": False,
-                "isFullstack": True,
-                "setupInstructions": result.setup_instructions,
-                "deploymentGuide": result.deployment_guide
-            })
+            else:
+                # Single project generation
+                result = await generate_code_with_agent(
+                    prompt=enhanced_prompt,
+                    framework=framework,
+                    theme=theme
+                )
 
-        else:
-            # Single project generation
-            result = await generate_code_with_agent(
-                prompt=enhanced_prompt,
-                framework=framework,
-                theme=theme
-            )
+                project_id = str(uuid.uuid4())
+                files = []
 
-            project_id = str(uuid.uuid4())
-            files = []
+                for file_info in result.files:
+                    files.append({
+                        "path": file_info.path,
+                        "content": file_info.content
+                    })
 
-            for file_info in result.files:
-                files.append({
-                    "path": file_info.path,
-                    "content": file_info.content
+                background_tasks.add_task(_save_files_in_background, project_id, files)
+
+                # Save to Firestore
+                project_ref = get_db().collection('projects').document(project_id)
+                await save_project_and_count(userId, project_ref, {
+                    "id": project_id,
+                    "name": f"Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                    "prompt": enhanced_prompt,
+                    "framework": framework,
+                    "theme": theme,
+                    "projectType": "single",
+                    "userId": userId,
+                    "createdAt": SERVER_TIMESTAMP,
+                    "updatedAt": SERVER_TIMESTAMP,
+                    "filesStatus": FILES_PENDING,
+                    "files": files,
+                    "hasImage": True
                 })
 
-            save_project_files(project_id, files, PROJECTS_DIR)
-
-            # Save to Firestore
-            project_ref = db.collection('projects').document(project_id)
-            project_ref.set({
-                "id": project_id,
-                "name": f"Project {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                "prompt": enhanced_prompt,
-                "framework": framework,
-                "theme": theme,
-                "projectType": "single",
-                "userId": userId,
-                "createdAt": SERVER_TIMESTAMP,
-                "updatedAt": SERVER_TIMESTAMP,
-                "files": files,
-                "hasImage": True
-            })
-
-            await increment_generation_count(userId)
-
-            is_frontend = framework in ["react", "nextjs", "vue", "angular", "html", "svelte"]
-
-            return JSONResponse({
-                "success": True,
-                "files": files,
-                "projectId": project_id,
-                "language": framework,
-                "isFrontend": is_frontend,
-                "isBackendOnly": framework in ["python", "nodejs", "php", "go", "java"]
-            })
+                is_frontend, is_backend_only = FRAMEWORK_TRAITS.get(framework, NO_FRAMEWORK_TRAITS)
+                return _generation_response(
+                    files, project_id, framework,
+                    is_frontend=is_frontend,
+                    is_backend_only=is_backend_only
+                )
 
     except Exception as e:
-        print(f"Image generation error: {str(e)}")
+        logger.error("Image generation error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -631,19 +776,19 @@ async def fix_project_endpoint(project_id: str):
         if not os.path.exists(project_path):
             raise HTTPException(status_code=404, detail="Project not found")
 
-        fix_result = fix_project(project_path)
+        fix_result = await asyncio.to_thread(fix_project, project_path)
 
         # Update project in Firestore with fixes applied
         try:
-            project_ref = db.collection('projects').document(project_id)
+            project_ref = get_db().collection('projects').document(project_id)
             project_ref.update({
                 "fixesApplied": fix_result.get("fixes", []),
                 "lastFixedAt": SERVER_TIMESTAMP
             })
         except Exception as e:
-            print(f"Error updating project in Firestore: {str(e)}")
+            logger.error("Error updating project in Firestore: %s", e)
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "fixes": fix_result.get("fixes", []),
             "projectType": fix_result.get("project_type", "unknown"),
@@ -653,225 +798,334 @@ async def fix_project_endpoint(project_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Fix project error: {str(e)}")
+        logger.error("Fix project error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def check_generation_limit(user_id: str, email: str):
+class GenerationLimit(NamedTuple):
+    """Outcome of check_generation_limit plus the user fields it was based on"""
+    can_generate: bool
+    plan: Optional[str] = None
+    current_count: int = 0
+    max_count: int = 3
+    first_generation_date: Optional[str] = None
+    last_generation_date: Optional[str] = None
+    first_generation_ts: Optional[float] = None
+
+GENERATION_WINDOW_SECONDS = 24 * 60 * 60
+
+# Short-lived per-process copy of user documents. The limit check and
+# the project write keep it current, so bursts from one user and the
+# check/debug endpoints read memory instead of Firestore
+USER_CACHE_TTL = 15
+# Every user field the limit check and the check/debug endpoints read; user
+# documents are fetched with only these
+USER_FIELDS = [
+    'email', 'plan', 'planExpiry', 'planExpiryTs', 'dailyGenerations', 'maxDailyGenerations',
+    'firstGenerationDate', 'firstGenerationTs', 'lastGenerationDate',
+]
+_USER_CACHE = TTLCache(maxsize=10000)
+
+async def get_cached_user(user_id: str) -> Optional[dict]:
+    """The user's document as a dict, from the cache when fresh; None if it doesn't exist"""
+    user_data = _USER_CACHE.get(user_id)
+    if user_data is None:
+        user_doc = await asyncio.to_thread(get_db().collection('users').document(user_id).get, field_paths=USER_FIELDS)
+        if not user_doc.exists:
+            return None
+        user_data = user_doc.to_dict()
+        _USER_CACHE.set(user_id, user_data, ttl=USER_CACHE_TTL)
+    return user_data
+
+# Project metadata shared by the edit, update, preview and build paths, so a
+# preview followed by a build (or repeated previews) reads Firestore once
+PROJECT_CACHE_TTL = 15
+PROJECT_META_FIELDS = ['userId', 'name', 'prompt', 'framework', 'filesStatus']
+_PROJECT_CACHE = TTLCache(maxsize=1000)
+
+async def get_cached_project(project_id: str) -> Optional[dict]:
+    """The project's PROJECT_META_FIELDS, from the cache when fresh; None if it doesn't exist"""
+    project_data = _PROJECT_CACHE.get(project_id)
+    if project_data is None:
+        project_ref = get_db().collection('projects').document(project_id)
+        project_doc = await asyncio.to_thread(project_ref.get, field_paths=PROJECT_META_FIELDS)
+        if not project_doc.exists:
+            return None
+        project_data = project_doc.to_dict()
+        _PROJECT_CACHE.set(project_id, project_data, ttl=PROJECT_CACHE_TTL)
+    return project_data
+
+def _update_cached_project(project_id: str, changes: dict):
+    project_data = _PROJECT_CACHE.get(project_id)
+    if project_data is not None:
+        fields = {key: value for key, value in changes.items() if key in PROJECT_META_FIELDS}
+        _PROJECT_CACHE.set(project_id, {**project_data, **fields}, ttl=PROJECT_CACHE_TTL)
+
+def _cached_limit(user_id: str) -> Optional[GenerationLimit]:
+    # A cached user well under the limit and inside their window skips the
+    # Firestore read entirely; one generation from the limit, a fresh read
+    # always decides
+    user_data = _USER_CACHE.get(user_id)
+    if user_data is None or user_data.get('firstGenerationTs') is None:
+        return None
+    current_count = user_data.get('dailyGenerations', 0)
+    max_count = user_data.get('maxDailyGenerations', 3)
+    if current_count + 1 >= max_count:
+        return None
+    if time.time() - user_data['firstGenerationTs'] >= GENERATION_WINDOW_SECONDS:
+        return None
+    return GenerationLimit(True, user_data.get('plan', 'free'), current_count, max_count,
+                           user_data.get('firstGenerationDate'), user_data.get('lastGenerationDate'),
+                           user_data['firstGenerationTs'])
+
+# Each user's stored dates stay the same across many requests, so parses are
+# memoized; the results are immutable and safe to share
+@functools.lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> Optional[datetime]:
+    """datetime for a stored ISO date, None if malformed"""
     try:
-        db = firestore.client()
-        user_ref = db.collection('users').document(user_id)
-        
-        # Use transaction to ensure data consistency
-        @firestore.transactional
-        def check_limit_transaction(transaction):
-            user_doc = user_ref.get(transaction=transaction)
-            
-            # Create user if doesn't exist
-            if not user_doc.exists:
-                user_data = {
-                    'email': email,
-                    'dailyGenerations': 0,
-                    'firstGenerationDate': datetime.now().isoformat(),
-                    'lastGenerationDate': datetime.now().isoformat(),
-                    'maxDailyGenerations': 3,  # Free plan default
-                    'plan': 'free',
-                    'planExpiry': None
-                }
-                transaction.set(user_ref, user_data)
-                print(f"Created new user {user_id} with free plan")
-                return True
-            
-            user_data = user_doc.to_dict()
-            
-            # Update maxDailyGenerations based on current plan
-            current_plan = user_data.get('plan', 'free')
-            if current_plan == 'pro':
-                if user_data.get('maxDailyGenerations', 3) != 20:
-                    transaction.update(user_ref, {
-                        'maxDailyGenerations': 20
-                    })
-                    user_data['maxDailyGenerations'] = 20
-                    print(f"User {user_id} plan updated to pro with 20 generations per day")
-            elif current_plan == 'free':
-                if user_data.get('maxDailyGenerations', 3) != 3:
-                    transaction.update(user_ref, {
-                        'maxDailyGenerations': 3
-                    })
-                    user_data['maxDailyGenerations'] = 3
-                    print(f"User {user_id} plan updated to free with 3 generations per day")
-            current_time = datetime.now()
-            
-            # Get the first generation date (when the 24-hour window started)
-            # Handle both timezone-aware and timezone-naive datetimes
-            first_gen_date_str = user_data.get('firstGenerationDate', user_data.get('lastGenerationDate'))
-            if first_gen_date_str:
-                try:
-                    first_gen_date = datetime.fromisoformat(first_gen_date_str)
-                    # If first_gen_date is timezone-aware, make current_time timezone-aware too
-                    if first_gen_date.tzinfo is not None:
-                        current_time = datetime.now(first_gen_date.tzinfo)
-                except ValueError:
-                    # Fallback to current time if parsing fails
-                    first_gen_date = current_time
-            else:
-                first_gen_date = current_time
-            
-            # Check for subscription expiry
-            plan_expiry = user_data.get('planExpiry')
-            if plan_expiry:
-                try:
-                    expiry_date = datetime.fromisoformat(plan_expiry)
-                    if current_time > expiry_date and user_data.get('plan') == 'pro':
-                        # Downgrade to free plan
-                        transaction.update(user_ref, {
-                            'plan': 'free',
-                            'maxDailyGenerations': 3,
-                            'planExpiry': None
-                        })
-                        user_data['plan'] = 'free'
-                        user_data['maxDailyGenerations'] = 3
-                        print(f"User {user_id} downgraded to free plan due to expiry")
-                except ValueError:
-                    print(f"Invalid plan expiry date format for user {user_id}")
-            
-            # Check if 24 hours have passed since the FIRST generation of the day
-            # This creates a rolling 24-hour window
-            time_since_first = current_time - first_gen_date
-            if time_since_first >= timedelta(hours=24):
-                # Reset counter and start new 24-hour window
-                transaction.update(user_ref, {
-                    'dailyGenerations': 0,
-                    'firstGenerationDate': current_time.isoformat(),
-                    'lastGenerationDate': current_time.isoformat()
-                })
-                print(f"User {user_id} 24h window reset. New window started at {current_time.isoformat()}")
-                return True
-            
-            # Check if user has generations left
-            current_count = user_data.get('dailyGenerations', 0)
-            max_count = user_data.get('maxDailyGenerations', 3)
-            
-            # Fix: Allow generation when current_count is 0 (first generation of the day)
-            can_generate = current_count < max_count
-            print(f"User {user_id} - Plan: {user_data.get('plan', 'free')}, Current: {current_count}/{max_count}, Can generate: {can_generate}")
-            print(f"  - firstGenerationDate: {first_gen_date}")
-            print(f"  - time_since_first: {time_since_first}")
-            print(f"  - 24h threshold: {timedelta(hours=24)}")
-            print(f"  - current_count < max_count: {current_count} < {max_count} = {current_count < max_count}")
-            
-            return can_generate
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+def _iso_to_epoch(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds for a stored ISO date (legacy documents), None if missing or malformed"""
+    parsed = _parse_iso(value) if value else None
+    # Naive values were written with datetime.now(), so they're local time,
+    # which is what timestamp() assumes for them
+    return parsed.timestamp() if parsed else None
+
+def _apply_limit_updates(user_ref, snapshot, updates: dict):
+    # Only the rare branches (new window, plan change, legacy backfill) write
+    # here. The precondition fails this write instead of overwriting a
+    # document that changed since it was read
+    if updates:
+        user_ref.update(updates, option=get_db().write_option(last_update_time=snapshot.update_time))
+
+def _check_limit_once(user_ref, user_id: str, email: str):
+    """One plain read of the user document plus any conditional fix-up write.
+
+    Returns (GenerationLimit, user_data as written). Blocking, so run it via
+    asyncio.to_thread.
+    """
+    snapshot = user_ref.get(field_paths=USER_FIELDS)
+    
+    # Create user if doesn't exist
+    if not snapshot.exists:
+        now = datetime.now()
+        user_data = {
+            'email': email,
+            'dailyGenerations': 0,
+            'firstGenerationDate': now.isoformat(),
+            'firstGenerationTs': now.timestamp(),
+            'lastGenerationDate': now.isoformat(),
+            'maxDailyGenerations': 3,  # Free plan default
+            'plan': 'free',
+            'planExpiry': None
+        }
+        # create() fails if a concurrent request created the user first
+        user_ref.create(user_data)
+        logger.info("Created new user %s with free plan", user_id)
+        return GenerationLimit(True, 'free', 0, 3, user_data['firstGenerationDate'], user_data['lastGenerationDate'],
+                               user_data['firstGenerationTs']), user_data
+    
+    user_data = snapshot.to_dict()
+    updates = {}
+    
+    # Update maxDailyGenerations based on current plan
+    current_plan = user_data.get('plan', 'free')
+    if current_plan == 'pro':
+        if user_data.get('maxDailyGenerations', 3) != 20:
+            updates['maxDailyGenerations'] = 20
+            logger.info("User %s plan updated to pro with 20 generations per day", user_id)
+    elif current_plan == 'free':
+        if user_data.get('maxDailyGenerations', 3) != 3:
+            updates['maxDailyGenerations'] = 3
+            logger.info("User %s plan updated to free with 3 generations per day", user_id)
+    current_time = datetime.now()
+    now_ts = current_time.timestamp()
+    
+    # Get the start of the 24-hour window as epoch seconds. Documents
+    # written before firstGenerationTs existed fall back to parsing the
+    # ISO date once, and the number is stored for next time
+    first_gen_ts = user_data.get('firstGenerationTs')
+    if first_gen_ts is None:
+        first_gen_ts = _iso_to_epoch(user_data.get('firstGenerationDate', user_data.get('lastGenerationDate')))
+        if first_gen_ts is None:
+            first_gen_ts = now_ts
+        else:
+            updates['firstGenerationTs'] = first_gen_ts
+    
+    # Check for subscription expiry. planExpiry is written outside this
+    # service, so a numeric planExpiryTs is used when present and the
+    # ISO string is only parsed for pro users otherwise
+    if current_plan == 'pro':
+        expiry_ts = user_data.get('planExpiryTs')
+        if expiry_ts is None and user_data.get('planExpiry'):
+            expiry_ts = _iso_to_epoch(user_data['planExpiry'])
+            if expiry_ts is None:
+                logger.warning("Invalid plan expiry date format for user %s", user_id)
+        if expiry_ts is not None and now_ts > expiry_ts:
+            # Downgrade to free plan
+            updates.update({
+                'plan': 'free',
+                'maxDailyGenerations': 3,
+                'planExpiry': None,
+                'planExpiryTs': None
+            })
+            logger.info("User %s downgraded to free plan due to expiry", user_id)
+    
+    # Check if 24 hours have passed since the FIRST generation of the day
+    # This creates a rolling 24-hour window
+    seconds_since_first = now_ts - first_gen_ts
+    if seconds_since_first >= GENERATION_WINDOW_SECONDS:
+        # Reset counter and start new 24-hour window
+        updates.update({
+            'dailyGenerations': 0,
+            'firstGenerationDate': current_time.isoformat(),
+            'firstGenerationTs': now_ts,
+            'lastGenerationDate': current_time.isoformat()
+        })
+        _apply_limit_updates(user_ref, snapshot, updates)
+        user_data.update(updates)
+        logger.info("User %s 24h window reset. New window started at %s", user_id, current_time.isoformat())
+        return GenerationLimit(True, user_data.get('plan', 'free'), 0, user_data.get('maxDailyGenerations', 3),
+                               current_time.isoformat(), current_time.isoformat(), now_ts), user_data
+    
+    _apply_limit_updates(user_ref, snapshot, updates)
+    user_data.update(updates)
+    
+    # Check if user has generations left
+    current_count = user_data.get('dailyGenerations', 0)
+    max_count = user_data.get('maxDailyGenerations', 3)
+    
+    # Fix: Allow generation when current_count is 0 (first generation of the day)
+    can_generate = current_count < max_count
+    # The argument expressions below aren't free, so skip them entirely unless debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("User %s - Plan: %s, Current: %s/%s, Can generate: %s", user_id, user_data.get('plan', 'free'), current_count, max_count, can_generate)
+        logger.debug("  - firstGenerationDate: %s", user_data.get('firstGenerationDate'))
+        logger.debug("  - time_since_first: %s", timedelta(seconds=seconds_since_first))
+        logger.debug("  - 24h threshold: %s", timedelta(seconds=GENERATION_WINDOW_SECONDS))
+        logger.debug("  - current_count < max_count: %s < %s = %s", current_count, max_count, current_count < max_count)
+    
+    return GenerationLimit(can_generate, user_data.get('plan', 'free'), current_count, max_count,
+                           user_data.get('firstGenerationDate'), user_data.get('lastGenerationDate'), first_gen_ts), user_data
+
+async def check_generation_limit(user_id: str, email: str) -> GenerationLimit:
+    cached = _cached_limit(user_id)
+    if cached is not None:
+        logger.debug("Generation limit cache hit for user %s: %s/%s", user_id, cached.current_count, cached.max_count)
+        return cached
+    try:
+        user_ref = get_db().collection('users').document(user_id)
         
-        # Run the transaction
+        # A plain read instead of a transaction: counting is done atomically
+        # by the Increment in save_project_and_count, so the check only needs
+        # a consistent snapshot
         try:
-            transaction = db.transaction()
-            result = check_limit_transaction(transaction)
-            print(f"Transaction completed successfully for user {user_id}, result: {result}")
+            try:
+                result, user_data = await asyncio.to_thread(_check_limit_once, user_ref, user_id, email)
+            except (FailedPrecondition, AlreadyExists):
+                # Another request wrote the document between the read and the
+                # fix-up write; read it again
+                result, user_data = await asyncio.to_thread(_check_limit_once, user_ref, user_id, email)
+            logger.debug("Limit check completed for user %s, result: %s", user_id, result.can_generate)
+            # The written state, including any plan change or window reset
+            _USER_CACHE.set(user_id, user_data, ttl=USER_CACHE_TTL)
             return result
         except Exception as e:
-            print(f"Transaction failed for user {user_id}: {str(e)}")
-            # Fallback: check without transaction
+            logger.warning("Limit check failed for user %s: %s", user_id, e)
+            # Fallback: check against the cached document
             try:
-                user_doc = user_ref.get()
-                if user_doc.exists:
-                    user_data = user_doc.to_dict()
+                user_data = await get_cached_user(user_id)
+                if user_data is not None:
                     current_count = user_data.get('dailyGenerations', 0)
                     max_count = user_data.get('maxDailyGenerations', 3)
                     can_generate = current_count < max_count
-                    print(f"Fallback check for user {user_id}: current={current_count}, max={max_count}, can_generate={can_generate}")
-                    return can_generate
+                    logger.warning("Fallback check for user %s: current=%s, max=%s, can_generate=%s", user_id, current_count, max_count, can_generate)
+                    return GenerationLimit(can_generate, user_data.get('plan'), current_count, max_count,
+                                           user_data.get('firstGenerationDate'), user_data.get('lastGenerationDate'))
                 else:
-                    print(f"User {user_id} not found in fallback check")
-                    return True  # Allow generation for new users
+                    logger.warning("User %s not found in fallback check", user_id)
+                    return GenerationLimit(True)  # Allow generation for new users
             except Exception as fallback_error:
-                print(f"Fallback check also failed for user {user_id}: {str(fallback_error)}")
-                return True  # Allow generation if all checks fail
+                logger.error("Fallback check also failed for user %s: %s", user_id, fallback_error)
+                return GenerationLimit(True)  # Allow generation if all checks fail
         
     except Exception as e:
-        print(f"Error checking generation limit: {str(e)}")
-        return False
+        logger.error("Error checking generation limit: %s", e)
+        return GenerationLimit(False)
 
-async def increment_generation_count(user_id: str):
+async def save_project_and_count(user_id: str, project_ref, project_data: dict, update: bool = False):
+    """Write the project and bump the user's generation count in one batched commit"""
     try:
-        db = firestore.client()
+        db = get_db()
         user_ref = db.collection('users').document(user_id)
+        current_time = datetime.now()
         
-        # Use transaction to prevent race conditions
-        @firestore.transactional
-        def increment_transaction(transaction):
-            user_doc = user_ref.get(transaction=transaction)
-            user_data = user_doc.to_dict()
-            
-            # Get current time for this transaction
-            current_time = datetime.now()
-            
-            # Get the first generation date (when the 24-hour window started)
-            # Handle both timezone-aware and timezone-naive datetimes
-            first_gen_date_str = user_data.get('firstGenerationDate', user_data.get('lastGenerationDate'))
-            if first_gen_date_str:
-                try:
-                    first_gen_date = datetime.fromisoformat(first_gen_date_str)
-                    # If first_gen_date is timezone-aware, make current_time timezone-aware too
-                    if first_gen_date.tzinfo is not None:
-                        current_time = datetime.now(first_gen_date.tzinfo)
-                except ValueError:
-                    # Fallback to current time if parsing fails
-                    first_gen_date = current_time
-            else:
-                first_gen_date = current_time
-            
-            # If 24 hours passed since first generation, start new window
-            time_since_first = current_time - first_gen_date
-            if time_since_first >= timedelta(hours=24):
-                transaction.update(user_ref, {
-                    'dailyGenerations': 1,
-                    'firstGenerationDate': current_time.isoformat(),
-                    'lastGenerationDate': current_time.isoformat()
-                })
-                print(f"User {user_id} - New 24h window started. Count reset to 1")
-            else:
-                # Otherwise increment count and update last generation date
-                current_count = user_data.get('dailyGenerations', 0)
-                new_count = current_count + 1
-                transaction.update(user_ref, {
-                    'dailyGenerations': firestore.Increment(1),
-                    'lastGenerationDate': current_time.isoformat()
-                })
-                print(f"User {user_id} - Generation count incremented to {new_count}")
-        
-        transaction = db.transaction()
-        increment_transaction(transaction)
+        batch = db.batch()
+        if update:
+            batch.update(project_ref, project_data)
+        else:
+            batch.set(project_ref, project_data)
+        # Every generating route runs check_generation_limit first, which
+        # resets an expired 24h window, so a plain increment is all that's left
+        batch.update(user_ref, {
+            'dailyGenerations': Increment(1),
+            'lastGenerationDate': current_time.isoformat()
+        })
+        await asyncio.to_thread(batch.commit)
+        logger.info("User %s - Generation count incremented", user_id)
+        
+        # Write the committed count through to the cached user document
+        cached = _USER_CACHE.get(user_id)
+        if cached is not None:
+            _USER_CACHE.set(user_id, {
+                **cached,
+                'dailyGenerations': cached.get('dailyGenerations', 0) + 1,
+                'lastGenerationDate': current_time.isoformat()
+            }, ttl=USER_CACHE_TTL)
         
     except Exception as e:
-        print(f"Error incrementing generation count: {str(e)}")
+        logger.error("Error saving project and incrementing generation count: %s", e)
         raise
     
 
+def _migrate_users_sync():
+    users_ref = get_db().collection('users')
+    # Only the two date fields are needed to decide, so don't pull whole documents
+    users = users_ref.select(['firstGenerationDate', 'lastGenerationDate']).stream()
+    
+    # BulkWriter pipelines the updates in parallel batches instead of one RPC per user
+    bulk_writer = get_db().bulk_writer()
+    migrated = 0
+    for user_doc in users:
+        user_data = user_doc.to_dict()
+        
+        # Check if user already has firstGenerationDate
+        if 'firstGenerationDate' not in user_data:
+            # Set firstGenerationDate to lastGenerationDate if it exists, otherwise to now
+            first_gen_date = user_data.get('lastGenerationDate', datetime.now().isoformat())
+            
+            bulk_writer.update(user_doc.reference, {
+                'firstGenerationDate': first_gen_date
+            })
+            migrated += 1
+            logger.debug("Migrated user %s with firstGenerationDate: %s", user_doc.id, first_gen_date)
+    
+    # Flushes the remaining writes and waits for them
+    bulk_writer.close()
+    return migrated
+
 async def migrate_existing_users():
     """Migrate existing users to include firstGenerationDate field"""
     try:
-        db = firestore.client()
-        users_ref = db.collection('users')
-        users = users_ref.stream()
-        
-        for user_doc in users:
-            user_data = user_doc.to_dict()
-            
-            # Check if user already has firstGenerationDate
-            if 'firstGenerationDate' not in user_data:
-                # Set firstGenerationDate to lastGenerationDate if it exists, otherwise to now
-                first_gen_date = user_data.get('lastGenerationDate', datetime.now().isoformat())
-                
-                user_ref = db.collection('users').document(user_doc.id)
-                user_ref.update({
-                    'firstGenerationDate': first_gen_date
-                })
-                print(f"Migrated user {user_doc.id} with firstGenerationDate: {first_gen_date}")
-        
-        print("Migration completed successfully")
+        migrated = await asyncio.to_thread(_migrate_users_sync)
+        logger.info("Migration completed successfully (%s users updated)", migrated)
         
     except Exception as e:
-        print(f"Error during migration: {str(e)}")
+        logger.error("Error during migration: %s", e)
 
 # Add this to your startup code or create an endpoint to run it
 # await migrate_existing_users()
@@ -880,17 +1134,14 @@ async def migrate_existing_users():
 async def simple_user_check(user_id: str):
     """Simple user check without transactions for debugging"""
     try:
-        db = firestore.client()
-        user_ref = db.collection('users').document(user_id)
-        user_doc = user_ref.get()
+        user_data = await get_cached_user(user_id)
         
-        if not user_doc.exists:
-            return JSONResponse(
+        if user_data is None:
+            return ORJSONResponse(
                 status_code=404,
                 content={"error": "User not found"}
             )
         
-        user_data = user_doc.to_dict()
         current_count = user_data.get('dailyGenerations', 0)
         max_count = user_data.get('maxDailyGenerations', 3)
         can_generate = current_count < max_count
@@ -907,10 +1158,10 @@ async def simple_user_check(user_id: str):
             "lastGenerationDate": user_data.get('lastGenerationDate')
         }
         
-        return JSONResponse(content=simple_check)
+        return ORJSONResponse(content=simple_check)
         
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Simple check failed: {str(e)}"}
         )
@@ -919,29 +1170,19 @@ async def simple_user_check(user_id: str):
 async def debug_user_status(user_id: str):
     """Debug endpoint to check user's generation status"""
     try:
-        db = firestore.client()
-        user_ref = db.collection('users').document(user_id)
-        user_doc = user_ref.get()
+        user_data = await get_cached_user(user_id)
         
-        if not user_doc.exists:
-            return JSONResponse(
+        if user_data is None:
+            return ORJSONResponse(
                 status_code=404,
                 content={"error": "User not found"}
             )
         
-        user_data = user_doc.to_dict()
         now = datetime.now()
         
         # Get the first generation date
         first_gen_date_str = user_data.get('firstGenerationDate', user_data.get('lastGenerationDate'))
-        first_gen_date = None
-        if first_gen_date_str:
-            try:
-                first_gen_date = datetime.fromisoformat(first_gen_date_str)
-            except ValueError:
-                first_gen_date = now
-        else:
-            first_gen_date = now
+        first_gen_date = (_parse_iso(first_gen_date_str) if first_gen_date_str else None) or now
         
         # Calculate time since first generation
         time_since_first = None
@@ -963,10 +1204,10 @@ async def debug_user_status(user_id: str):
             "remainingGenerations": max(0, user_data.get('maxDailyGenerations', 3) - user_data.get('dailyGenerations', 0))
         }
         
-        return JSONResponse(content=debug_info)
+        return ORJSONResponse(content=debug_info)
         
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Debug failed: {str(e)}"}
         )
@@ -976,12 +1217,12 @@ async def run_migration():
     """Run migration for existing users"""
     try:
         await migrate_existing_users()
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200,
             content={"message": "Migration completed successfully"}
         )
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Migration failed: {str(e)}"}
         )
@@ -992,13 +1233,14 @@ async def run_migration():
 @app.get("/projects/{user_id}")
 async def get_user_projects(user_id: str):
     try:
-        projects_ref = db.collection('projects').where('userId', '==', user_id)
-        docs = projects_ref.stream()  # Changed from get() to stream()
+        projects_ref = get_db().collection('projects').where('userId', '==', user_id)
+        docs = projects_ref.select(['id', 'name', 'prompt', 'framework', 'createdAt', 'updatedAt']).stream()
         
         projects = []
         for doc in docs:
             project = doc.to_dict()
-            # Convert timestamps
+            # Convert timestamps; orjson rejects Firestore's datetime subclass,
+            # so these stay explicit even though the response skips the encoder
             if 'createdAt' in project:
                 project['createdAt'] = project['createdAt'].isoformat()
             if 'updatedAt' in project:
@@ -1013,16 +1255,17 @@ async def get_user_projects(user_id: str):
                 "updatedAt": project.get("updatedAt")
             })
             
-        return {"projects": projects}
+        # Returned directly so the list isn't walked again by jsonable_encoder
+        return ORJSONResponse({"projects": projects})
     except Exception as e:
-        print(f"Error getting user projects: {str(e)}")  # Add logging
+        logger.error("Error getting user projects: %s", e)  # Add logging
         raise HTTPException(status_code=500, detail=str(e))
     
     
 @app.get("/project/{project_id}")
 async def get_project(project_id: str):
     try:
-        project_ref = db.collection('projects').document(project_id)
+        project_ref = get_db().collection('projects').document(project_id)
         project_doc = project_ref.get()  # Remove await
         
         if not project_doc.exists:
@@ -1040,24 +1283,27 @@ async def get_project(project_id: str):
         return project_data
         
     except Exception as e:
-        print(f"Error getting project: {str(e)}")  # Add logging
+        logger.error("Error getting project: %s", e)  # Add logging
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.delete("/project/{project_id}")
 async def delete_project(project_id: str):
     try:
         # Delete from Firestore
-        db.collection('projects').document(project_id).delete()  # Remove await
+        get_db().collection('projects').document(project_id).delete()  # Remove await
+        _PROJECT_CACHE.delete(project_id)
         
         # Delete project files
         project_dir = os.path.join(PROJECTS_DIR, project_id)
         if os.path.exists(project_dir):
             import shutil
             shutil.rmtree(project_dir)
+        for artifact in Path(ZIP_CACHE_DIR).glob(f"{project_id}-*.zip"):
+            artifact.unlink(missing_ok=True)
             
         return {"success": True}
     except Exception as e:
-        print(f"Error deleting project: {str(e)}")
+        logger.error("Error deleting project: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/project/{project_id}")
@@ -1066,13 +1312,12 @@ async def update_project(project_id: str, request: Request):
         data = await request.json()
         
         # Verify the project exists and belongs to the user
-        project_ref = db.collection('projects').document(project_id)
-        project_doc = project_ref.get()
+        project_ref = get_db().collection('projects').document(project_id)
+        project_data = await get_cached_project(project_id)
         
-        if not project_doc.exists:
+        if project_data is None:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        project_data = project_doc.to_dict()
         user_id = data.get("userId")
         
         if project_data.get('userId') != user_id:
@@ -1090,66 +1335,142 @@ async def update_project(project_id: str, request: Request):
         if "files" in data:
             update_data["files"] = data["files"]
             # Also save files to disk
-            save_project_files(project_id, data["files"], PROJECTS_DIR)
+            await asyncio.to_thread(save_project_files, project_id, data["files"], PROJECTS_DIR)
         
         project_ref.update(update_data)
+        _update_cached_project(project_id, update_data)
         
         return {"success": True, "message": "Project updated successfully"}
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error updating project: {str(e)}")
+        logger.error("Error updating project: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.get("/download/{project_id}")
-async def download_project(project_id: str):
+async def download_project(project_id: str, request: Request):
     try:
-        zip_path = zip_project_files(project_id, PROJECTS_DIR)
-        if not os.path.exists(zip_path):
+        await _require_saved_files(project_id)
+        try:
+            project_zip = await asyncio.to_thread(stream_project_zip, project_id, PROJECTS_DIR, ZIP_CACHE_DIR)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Project not found")
-        return FileResponse(zip_path, filename=f"{project_id}.zip")
+        etag = f'"{project_zip.etag}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(project_zip.last_modified, usegmt=True),
+            "Cache-Control": "private, max-age=60",
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        headers["Content-Disposition"] = f'attachment; filename="{project_id}.zip"'
+        if project_zip.path:
+            return FileResponse(project_zip.path, media_type="application/zip", headers=headers)
+        return StreamingResponse(project_zip.stream, media_type="application/zip", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Classic tokens are ghp_ plus 36 characters; fine-grained ones are github_pat_
+# plus at least 49. Anything else (whitespace, pasted quotes) is rejected up front
+_GITHUB_TOKEN_RE = re.compile(r"ghp_[A-Za-z0-9]{36}|github_pat_[A-Za-z0-9_]{49,}")
+
 @app.post("/github/push")
 async def github_push(data: PushToGithubRequest):
+    if not _GITHUB_TOKEN_RE.fullmatch(data.token):
+        raise HTTPException(status_code=400, detail="Invalid GitHub token format")
     try:
-        if not (
-            (data.token.startswith("ghp_") and len(data.token) == 40) or
-            (data.token.startswith("github_pat_") and len(data.token) >= 60)
-        ):
-            raise ValueError("Invalid GitHub token format")
-
         result = push_to_github(data.projectId, data.repoName, data.token)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Subprocess output is read in small chunks as it arrives; JSON responses keep
+# only the tail of each stream so a noisy `npm install` can't pin hundreds of MB
+PROCESS_READ_SIZE = 4096
+PROCESS_OUTPUT_LIMIT = 1 << 20
+
+async def _iter_process_output(process):
+    """Yield (stream name, chunk) pairs from a subprocess's stdout and stderr as they arrive"""
+    queue = asyncio.Queue()
+
+    async def pump(name, stream):
+        while chunk := await stream.read(PROCESS_READ_SIZE):
+            await queue.put((name, chunk))
+        await queue.put((name, None))
+
+    pumps = [
+        asyncio.create_task(pump("stdout", process.stdout)),
+        asyncio.create_task(pump("stderr", process.stderr)),
+    ]
+    try:
+        open_streams = len(pumps)
+        while open_streams:
+            name, chunk = await queue.get()
+            if chunk is None:
+                open_streams -= 1
+            else:
+                yield name, chunk
+        await process.wait()
+    finally:
+        for task in pumps:
+            task.cancel()
+        # The client went away mid-stream; don't leave the command running
+        if process.returncode is None:
+            process.kill()
+
+async def _collect_process_output(process):
+    """Run a subprocess to completion, returning the decoded tail of its stdout and stderr"""
+    output = {"stdout": bytearray(), "stderr": bytearray()}
+    async for name, chunk in _iter_process_output(process):
+        buffer = output[name]
+        buffer += chunk
+        if len(buffer) > PROCESS_OUTPUT_LIMIT:
+            del buffer[:-PROCESS_OUTPUT_LIMIT]
+    return output["stdout"].decode(errors="replace"), output["stderr"].decode(errors="replace")
+
+async def _ndjson_process_output(process):
+    """NDJSON lines for one subprocess: {"stream", "data"} per chunk, then {"return_code"}"""
+    decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")}
+    async for name, chunk in _iter_process_output(process):
+        # Incremental decoding keeps multi-byte characters split across reads intact
+        text = decoders[name].decode(chunk)
+        if text:
+            yield orjson.dumps({"stream": name, "data": text}) + b"\n"
+    yield orjson.dumps({"return_code": process.returncode}) + b"\n"
+
 @app.post("/terminal/execute")
-async def execute_terminal_command(data: TerminalCommandRequest):
+async def execute_terminal_command(data: TerminalCommandRequest, request: Request):
     try:
+        await _require_saved_files(data.projectId)
         project_dir = os.path.join(PROJECTS_DIR, data.projectId)
         if not os.path.exists(project_dir):
             raise HTTPException(status_code=404, detail="Project not found")
         
+        # User commands may use pipes and &&, so these still go through the shell
         process = await asyncio.create_subprocess_shell(
             data.command,
             cwd=project_dir,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=True
+            stderr=subprocess.PIPE
         )
         
-        stdout, stderr = await process.communicate()
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            return StreamingResponse(_ndjson_process_output(process), media_type=NDJSON_MEDIA_TYPE)
+        
+        stdout, stderr = await _collect_process_output(process)
         
         return {
             "success": True,
-            "output": stdout.decode(),
-            "error": stderr.decode(),
+            "output": stdout,
+            "error": stderr,
             "return_code": process.returncode
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1157,43 +1478,81 @@ async def execute_terminal_command(data: TerminalCommandRequest):
 async def get_project_files(project_id: str):
     try:
         project_dir = os.path.join(PROJECTS_DIR, project_id)
-        if not os.path.exists(project_dir):
+        _, dir_exists = await asyncio.gather(
+            _require_saved_files(project_id),
+            asyncio.to_thread(os.path.exists, project_dir)
+        )
+        if not dir_exists:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        files = []
-        for root, _, filenames in os.walk(project_dir):
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                files.append({
-                    "path": os.path.relpath(file_path, project_dir),
-                    "content": content
-                })
-        
-        return {"files": files}
+        paths = await asyncio.to_thread(_list_project_paths, project_dir)
+        return StreamingResponse(_stream_project_files(project_dir, paths), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+PROJECT_FILE_READ_CONCURRENCY = 16
+
+async def _stream_project_files(project_dir: str, paths: List[str]):
+    """Yield the {"files": [...]} body a group of files at a time, so only one
+    group of file contents is in memory at once"""
+    root = Path(project_dir)
+    separator = b""
+    yield b'{"files":['
+    for start in range(0, len(paths), PROJECT_FILE_READ_CONCURRENCY):
+        group = paths[start:start + PROJECT_FILE_READ_CONCURRENCY]
+        entries = await asyncio.gather(*(asyncio.to_thread(_read_project_file, root / path) for path in group))
+        chunk = b",".join(
+            orjson.dumps({"path": path, **entry})
+            for path, entry in zip(group, entries)
+            if entry is not None
+        )
+        if chunk:
+            yield separator + chunk
+            separator = b","
+    yield b"]}"
+
+# Preview pages are memoized on mtime: a rebuild or file save changes the
+# stat result, so stale entries simply stop being looked up
+@functools.lru_cache(maxsize=256)
+def _html_files_at(directory: str, mtime_ns: int) -> tuple:
+    return tuple(f for f in os.listdir(directory) if f.lower().endswith('.html'))
+
+@functools.lru_cache(maxsize=256)
+def _html_bytes_at(path: str, mtime_ns: int, size: int) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _list_html_files(directory: str) -> tuple:
+    return _html_files_at(directory, os.stat(directory).st_mtime_ns)
+
+def _read_html_file(path: str) -> bytes:
+    stat = os.stat(path)
+    return _html_bytes_at(path, stat.st_mtime_ns, stat.st_size)
+
 @app.get("/preview/{project_id}")
 async def get_frontend_preview(project_id: str):
     try:
         project_dir = os.path.join(PROJECTS_DIR, project_id)
         
-        # Verify project exists in Firestore first
-        project_ref = db.collection('projects').document(project_id)
-        project_doc = project_ref.get()
+        # Verify project exists in Firestore first; the directory check runs
+        # in parallel with the Firestore round trip
+        project_data, dir_exists = await asyncio.gather(
+            get_cached_project(project_id),
+            asyncio.to_thread(os.path.exists, project_dir)
+        )
         
-        if not project_doc.exists:
+        if project_data is None:
             raise HTTPException(status_code=404, detail="Project not found in database")
+        _check_files_status(project_data)
             
-        if not os.path.exists(project_dir):
+        if not dir_exists:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Project files not found at {project_dir}"
             )
         
-        project_data = project_doc.to_dict()
         framework = project_data.get('framework', '').lower()
         
         # Handle different frameworks
@@ -1212,17 +1571,13 @@ async def get_frontend_preview(project_id: str):
                 build_dir = build_dirs.get(framework, 'build')
                 build_path = os.path.join(project_dir, build_dir)
                 
-                if os.path.exists(build_path):
+                if await asyncio.to_thread(os.path.exists, build_path):
                     # Look for index.html in build directory
-                    html_files = [
-                        f for f in os.listdir(build_path) 
-                        if f.lower().endswith('.html')
-                    ]
+                    html_files = await asyncio.to_thread(_list_html_files, build_path)
                     
                     if html_files:
                         html_file = html_files[0]
-                        with open(os.path.join(build_path, html_file), 'r') as f:
-                            content = f.read()
+                        content = await asyncio.to_thread(_read_html_file, os.path.join(build_path, html_file))
                         return HTMLResponse(content=content)
                 
                 # If no build directory, try to build the project
@@ -1278,49 +1633,35 @@ async def get_frontend_preview(project_id: str):
                     """)
                 
                 # For other frameworks, try to find HTML files in root
-                html_files = [
-                    f for f in os.listdir(project_dir) 
-                    if f.lower().endswith('.html')
-                ]
+                html_files = await asyncio.to_thread(_list_html_files, project_dir)
                 
                 if html_files:
                     html_file = html_files[0]
-                    with open(os.path.join(project_dir, html_file), 'r') as f:
-                        content = f.read()
+                    content = await asyncio.to_thread(_read_html_file, os.path.join(project_dir, html_file))
                     return HTMLResponse(content=content)
                 
             except Exception as e:
-                print(f"Error building {framework} project: {str(e)}")
+                logger.error("Error building %s project: %s", framework, e)
         
         # Fallback: look for HTML files in project root
-        html_files = [
-            f for f in os.listdir(project_dir) 
-            if f.lower().endswith('.html')
-        ]
+        html_files = await asyncio.to_thread(_list_html_files, project_dir)
         
         if not html_files:
-            # Try to find index.html specifically
-            possible_files = ['index.html', 'main.html', 'app.html']
-            html_files = [
-                f for f in possible_files
-                if os.path.exists(os.path.join(project_dir, f))
-            ]
-            
-            if not html_files:
-                return HTMLResponse(
-                    content=f"<h1>No HTML file found in this {framework} project</h1><p>This project uses {framework} framework and needs to be built first.</p>", 
-                    status_code=404
-                )
+            return HTMLResponse(
+                content=f"<h1>No HTML file found in this {framework} project</h1><p>This project uses {framework} framework and needs to be built first.</p>", 
+                status_code=404
+            )
         
-        # Try each HTML file until we find one that works
-        for html_file in html_files:
-            try:
-                with open(os.path.join(project_dir, html_file), 'r') as f:
-                    content = f.read()
+        # Read every candidate at once and serve the first one, in listing
+        # order, that could be read
+        results = await asyncio.gather(
+            *(asyncio.to_thread(_read_html_file, os.path.join(project_dir, html_file)) for html_file in html_files),
+            return_exceptions=True
+        )
+        for html_file, content in zip(html_files, results):
+            if not isinstance(content, Exception):
                 return HTMLResponse(content=content)
-            except Exception as e:
-                print(f"Error reading {html_file}: {str(e)}")
-                continue
+            logger.warning("Error reading %s: %s", html_file, content)
         
         return HTMLResponse(
             content="<h1>Could not read any HTML files</h1>",
@@ -1330,7 +1671,7 @@ async def get_frontend_preview(project_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Preview error: {str(e)}")
+        logger.error("Preview error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1345,72 +1686,117 @@ async def build_project(request: Request):
             raise HTTPException(status_code=400, detail="Project ID is required")
         
         project_dir = os.path.join(PROJECTS_DIR, project_id)
-        if not os.path.exists(project_dir):
-            raise HTTPException(status_code=404, detail="Project not found")
         
-        # Get project info from Firestore
-        project_ref = db.collection('projects').document(project_id)
-        project_doc = project_ref.get()
+        # Get project info from Firestore while checking the directory
+        project_data, dir_exists = await asyncio.gather(
+            get_cached_project(project_id),
+            asyncio.to_thread(os.path.exists, project_dir)
+        )
         
-        if not project_doc.exists:
+        if project_data is None:
             raise HTTPException(status_code=404, detail="Project not found in database")
+        _check_files_status(project_data)
+        
+        if not dir_exists:
+            raise HTTPException(status_code=404, detail="Project not found")
         
-        project_data = project_doc.to_dict()
         framework = project_data.get('framework', '').lower()
         
-        # Build commands for different frameworks
+        # Build steps for different frameworks, run one after another without a shell
+        install = ['npm', 'install']
         build_commands = {
-            'nextjs': ['npm', 'install', '&&', 'npm', 'run', 'build'],
-            'react': ['npm', 'install', '&&', 'npm', 'run', 'build'],
-            'vue': ['npm', 'install', '&&', 'npm', 'run', 'build'],
-            'angular': ['npm', 'install', '&&', 'ng', 'build'],
-            'svelte': ['npm', 'install', '&&', 'npm', 'run', 'build']
+            'nextjs': [install, ['npm', 'run', 'build']],
+            'react': [install, ['npm', 'run', 'build']],
+            'vue': [install, ['npm', 'run', 'build']],
+            'angular': [install, ['ng', 'build']],
+            'svelte': [install, ['npm', 'run', 'build']]
         }
         
         if framework not in build_commands:
             raise HTTPException(status_code=400, detail=f"Building {framework} projects is not supported")
         
         # Run build command
-        build_cmd = ' '.join(build_commands[framework])
-        print(f"Building {framework} project: {build_cmd}")
-        
-        process = await asyncio.create_subprocess_shell(
-            build_cmd,
-            cwd=project_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=True
-        )
+        steps = build_commands[framework]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Building %s project: %s", framework, ' && '.join(' '.join(argv) for argv in steps))
+        
+        async def start(argv):
+            return await asyncio.create_subprocess_exec(
+                *argv,
+                cwd=project_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
         
-        stdout, stderr = await process.communicate()
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            async def lines():
+                # One {"step"} line per command, its output lines, and a final
+                # {"success"} line; a failing step stops the build like && did
+                for argv in steps:
+                    yield orjson.dumps({"step": " ".join(argv)}) + b"\n"
+                    process = await start(argv)
+                    async for line in _ndjson_process_output(process):
+                        yield line
+                    if process.returncode != 0:
+                        yield orjson.dumps({"success": False}) + b"\n"
+                        return
+                yield orjson.dumps({"success": True, "message": "Project built successfully"}) + b"\n"
+            
+            return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
         
-        if process.returncode != 0:
-            print(f"Build failed: {stderr.decode()}")
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Build failed: {stderr.decode()}"
-            )
+        outputs = []
+        for argv in steps:
+            process = await start(argv)
+            stdout, stderr = await _collect_process_output(process)
+            outputs.append(stdout)
+            
+            if process.returncode != 0:
+                logger.warning("Build failed: %s", stderr)
+                raise HTTPException(
+                    status_code=500, 
+                    detail=f"Build failed: {stderr}"
+                )
         
-        print(f"Build successful: {stdout.decode()}")
+        output = "".join(outputs)
+        logger.debug("Build successful: %s", output)
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "message": "Project built successfully",
-            "output": stdout.decode()
+            "output": output
         })
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Build error: {str(e)}")
+        logger.error("Build error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _save_chat_turn(conversation_id: str, user_message: dict, assistant_message: dict, asked_at: datetime):
+    """Background task: write both messages of a chat turn in one batched commit"""
+    try:
+        db = get_db()
+        messages_ref = db.collection('conversations').document(conversation_id).collection('messages')
+        # One batch would give both messages the same SERVER_TIMESTAMP, leaving
+        # their order to the random document IDs; explicit times keep the user
+        # message (when it arrived) strictly before the reply (when it finished)
+        answered_at = max(datetime.now(timezone.utc), asked_at + timedelta(milliseconds=1))
+        batch = db.batch()
+        # document() generates the IDs client-side, so no RPC until the commit
+        batch.set(messages_ref.document(), {**user_message, 'timestamp': asked_at})
+        batch.set(messages_ref.document(), {**assistant_message, 'timestamp': answered_at})
+        batch.commit()
+    except Exception as e:
+        logger.error("Error saving conversation %s: %s", conversation_id, e)
+
+
 @app.post("/chat")
-async def chat_with_ai(request: ChatRequest):
+async def chat_with_ai(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Chat endpoint for CodeFusion AI assistant
     """
+    asked_at = datetime.now(timezone.utc)
     try:
         # Analyze message intent
         intent = analyze_message_intent(request.message)
@@ -1424,26 +1810,17 @@ async def chat_with_ai(request: ChatRequest):
             response = await generate_chat_response(request.message)
             image_url = None
 
-        # Save conversation to Firebase (optional)
+        # Save conversation to Firebase (optional), after the response is sent
         if request.conversationId:
-            try:
-                conversation_ref = db.collection('conversations').document(request.conversationId)
-                conversation_ref.collection('messages').add({
-                    'role': 'user',
-                    'content': request.message,
-                    'timestamp': SERVER_TIMESTAMP,
-                    'userId': request.userId
-                })
-                conversation_ref.collection('messages').add({
-                    'role': 'assistant',
-                    'content': response,
-                    'timestamp': SERVER_TIMESTAMP,
-                    'intent': intent
-                })
-            except Exception as e:
-                print(f"Error saving conversation: {str(e)}")
+            background_tasks.add_task(
+                _save_chat_turn,
+                request.conversationId,
+                {'role': 'user', 'content': request.message, 'userId': request.userId},
+                {'role': 'assistant', 'content': response, 'intent': intent},
+                asked_at,
+            )
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "response": response,
             "intent": intent,
@@ -1451,15 +1828,50 @@ async def chat_with_ai(request: ChatRequest):
         })
 
     except Exception as e:
-        print(f"Chat error: {str(e)}")
+        logger.error("Chat error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/chat/stream")
+async def chat_with_ai_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint: sends the reply as plain text chunks while Gemini generates it
+    """
+    asked_at = datetime.now(timezone.utc)
+    intent = analyze_message_intent(request.message)
+
+    chunks = []
+
+    async def body():
+        if intent == 'image_generation':
+            image_result = await generate_image_response(request.message)
+            chunks.append(image_result["text"])
+            yield image_result["text"]
+        else:
+            async for chunk in stream_chat_response(request.message):
+                chunks.append(chunk)
+                yield chunk
+
+    def save_turn():
+        # Runs once the whole reply has been streamed, so chunks is complete
+        _save_chat_turn(
+            request.conversationId,
+            {'role': 'user', 'content': request.message, 'userId': request.userId},
+            {'role': 'assistant', 'content': "".join(chunks), 'intent': intent},
+            asked_at,
+        )
+
+    # Save conversation to Firebase (optional) once the full reply is known
+    background = BackgroundTask(save_turn) if request.conversationId else None
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8", headers={"X-Intent": intent}, background=background)
+
+
 @app.post("/chat/image")
-async def chat_with_image(request: ImageChatRequest):
+async def chat_with_image(request: ImageChatRequest, background_tasks: BackgroundTasks):
     """
     Chat endpoint with image upload for CodeFusion AI assistant
     """
+    asked_at = datetime.now(timezone.utc)
     try:
         import base64
 
@@ -1469,34 +1881,24 @@ async def chat_with_image(request: ImageChatRequest):
         # Generate response with image analysis
         response = await generate_chat_response(request.message, image_data)
 
-        # Save conversation to Firebase (optional)
+        # Save conversation to Firebase (optional), after the response is sent
         if request.conversationId:
-            try:
-                conversation_ref = db.collection('conversations').document(request.conversationId)
-                conversation_ref.collection('messages').add({
-                    'role': 'user',
-                    'content': request.message,
-                    'hasImage': True,
-                    'timestamp': SERVER_TIMESTAMP,
-                    'userId': request.userId
-                })
-                conversation_ref.collection('messages').add({
-                    'role': 'assistant',
-                    'content': response,
-                    'timestamp': SERVER_TIMESTAMP,
-                    'intent': 'image_analysis'
-                })
-            except Exception as e:
-                print(f"Error saving conversation: {str(e)}")
+            background_tasks.add_task(
+                _save_chat_turn,
+                request.conversationId,
+                {'role': 'user', 'content': request.message, 'hasImage': True, 'userId': request.userId},
+                {'role': 'assistant', 'content': response, 'intent': 'image_analysis'},
+                asked_at,
+            )
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "response": response,
             "intent": "image_analysis"
         })
 
     except Exception as e:
-        print(f"Image chat error: {str(e)}")
+        logger.error("Image chat error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     
 # handler = Mangum(app)
\ No newline at end of file
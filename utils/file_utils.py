@@ -1,6 +1,14 @@
 import os
+import base64
+import hashlib
+import logging
+import tempfile
 import zipfile
 from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+from zipstream import ZipStream
+
+logger = logging.getLogger(__name__)
 
 def save_project_files(project_id: str, files: list, base_dir: str):
     try:
@@ -10,12 +18,17 @@ def save_project_files(project_id: str, files: list, base_dir: str):
         for file in files:
             file_path = os.path.join(project_dir, file['path'])
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(file['content'])
+            if file.get('encoding') == 'base64':
+                # Binary assets loaded from an existing project
+                with open(file_path, 'wb') as f:
+                    f.write(base64.b64decode(file['content']))
+            else:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(file['content'])
                 
         return True
     except Exception as e:
-        print(f"Error saving files: {str(e)}")
+        logger.error("Error saving files: %s", e)
         raise  
 
 def zip_project_files(project_id: str, base_dir: str = "projects") -> str:
@@ -32,4 +45,59 @@ def zip_project_files(project_id: str, base_dir: str = "projects") -> str:
                 arcname = file.relative_to(project_dir)
                 zipf.write(file, arcname)
     
-    return str(zip_path)
\ No newline at end of file
+    return str(zip_path)
+
+class ProjectZip(NamedTuple):
+    etag: str
+    last_modified: float
+    path: Optional[str]  # cached artifact, when one matches the current tree
+    stream: Optional[Iterator[bytes]]  # zip built on the fly otherwise
+
+def _snapshot_project(project_dir: Path):
+    """Project files with a fingerprint of their paths, sizes and mtimes"""
+    files = sorted(file for file in project_dir.rglob("*") if file.is_file())
+    digest = hashlib.sha1()
+    last_modified = 0.0
+    for file in files:
+        stat = file.stat()
+        digest.update(f"{file.relative_to(project_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        last_modified = max(last_modified, stat.st_mtime)
+    return files, digest.hexdigest()[:16], last_modified
+
+def _tee_to_artifact(chunks: Iterator[bytes], project_id: str, zip_path: Path) -> Iterator[bytes]:
+    """Yield the zip while writing it to zip_path; partial downloads leave nothing behind"""
+    fd, tmp_path = tempfile.mkstemp(dir=zip_path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    # Older artifacts of this project can't be served again
+    for stale in zip_path.parent.glob(f"{project_id}-*.zip"):
+        if stale != zip_path:
+            stale.unlink(missing_ok=True)
+
+def stream_project_zip(project_id: str, base_dir: str = "projects", cache_dir: str = "zip_cache") -> ProjectZip:
+    """Zip of the project files, served from cache_dir while the tree is unchanged"""
+    project_dir = Path(base_dir) / project_id
+    
+    if not project_dir.exists():
+        raise FileNotFoundError(f"Project directory not found: {project_dir}")
+    
+    files, etag, last_modified = _snapshot_project(project_dir)
+    zip_path = Path(cache_dir) / f"{project_id}-{etag}.zip"
+    if zip_path.exists():
+        return ProjectZip(etag, last_modified, str(zip_path), None)
+    
+    zs = ZipStream(compress_type=zipfile.ZIP_DEFLATED)
+    for file in files:
+        # Only the paths are collected here; each file is read and
+        # deflated while the response iterates the stream
+        zs.add_path(str(file), str(file.relative_to(project_dir)))
+    
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    return ProjectZip(etag, last_modified, None, _tee_to_artifact(iter(zs), project_id, zip_path))
@@ -0,0 +1,29 @@
+import os
+import threading
+
+_cfg_lock = threading.Lock()
+_configured = False
+
+def _transport() -> str:
+    # gRPC keeps one multiplexed HTTP/2 channel open for the process; fall back
+    # to REST only when the grpc extras aren't installed
+    try:
+        import grpc  # noqa: F401
+        return "grpc"
+    except ImportError:
+        return "rest"
+
+def configure_gemini():
+    """Import and configure google-generativeai once per process and return the module"""
+    global _configured
+    import google.generativeai as genai
+    # Double-checked: concurrent first callers serialize on the lock exactly
+    # once, after that the flag read is lock-free
+    if not _configured:
+        with _cfg_lock:
+            if not _configured:
+                from dotenv import load_dotenv
+                load_dotenv()
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"), transport=_transport())
+                _configured = True
+    return genai
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import math
+import time
+from utils.gemini_utils import configure_gemini
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class LLMCache(TTLCache):
+    """In-memory LRU cache of generation results with a TTL.
+
+    Besides exact key hits, entries can carry a normalized prompt embedding
+    so near-duplicate prompts within the same scope (e.g. framework/theme)
+    reuse a result.
+    """
+
+    def __init__(self, maxsize: int = 256, similarity: float = 0.95):
+        super().__init__(maxsize)
+        self.similarity = similarity
+        self._vectors = {}  # key -> (scope, vector)
+
+    def set(self, key: str, value, ttl: float = 3600, scope=None, vector=None):
+        if vector is not None:
+            self._vectors[key] = (scope, vector)
+        super().set(key, value, ttl)
+
+    def find_similar(self, scope, vector):
+        now = time.monotonic()
+        best_key, best_score = None, self.similarity
+        for key, (entry_scope, stored) in self._vectors.items():
+            # Expired entries are skipped so they can't shadow a live match
+            if entry_scope != scope or self._entries[key][0] < now:
+                continue
+            score = sum(a * b for a, b in zip(stored, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self.get(best_key) if best_key is not None else None
+
+    def _evict(self, key: str):
+        super()._evict(key)
+        self._vectors.pop(key, None)
+
+async def embed_prompt(prompt: str):
+    # Embedding failures only cost the semantic lookup, never the generation
+    try:
+        response = await asyncio.to_thread(configure_gemini().embed_content, model="models/text-embedding-004", content=prompt)
+    except Exception as e:
+        logger.warning("Embedding error: %s", e)
+        return None
+    vector = response["embedding"]
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
@@ -0,0 +1,18 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+def setup_queue_logging(level: int = logging.INFO) -> QueueListener:
+    """Route root logging through an unbounded queue drained by a background
+    thread, so request handlers never block on the stderr write"""
+    log_queue = queue.Queue(-1)
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers[:] = [QueueHandler(log_queue)]
+
+    listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,31 @@
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """In-memory LRU cache whose entries expire after a per-entry TTL"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value, ttl: float = 3600):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._evict(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        self._evict(key)
+
+    def _evict(self, key: str):
+        self._entries.pop(key, None)